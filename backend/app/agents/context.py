@@ -0,0 +1,66 @@
+import time
+import uuid
+import asyncio
+from typing import Dict, Any, List, Optional
+
+from app.tracing import TraceRecord
+
+
+def ms_since(started: float) -> float:
+    """Milliseconds elapsed since a time.perf_counter() reading"""
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class ResearchContext:
+    """Per-request state carried through the research, analysis and synthesis phases
+
+    Agents are shared singletons, so nothing request-specific may live on
+    them. Each call to process_question gets its own context holding the
+    trace and the intermediate results, which lets one worker serve many
+    overlapping questions without their traces mixing.
+    """
+
+    def __init__(self, question: str, deadline: Optional[float] = None):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.question = question
+        self.started_at = time.perf_counter()
+        # Absolute time.perf_counter() reading the answer is due by, if any
+        self.deadline = deadline
+        self.skipped: List[str] = []
+        self.trace: List[TraceRecord] = []
+        self.search_results: List[Dict[str, Any]] = []
+        self.sources: List[Dict[str, Any]] = []
+        self.analysis: Dict[str, Any] = {}
+        self.evidence: List[Dict[str, Any]] = []
+        self._listeners: List[asyncio.Queue] = []
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue that receives every trace record as it is recorded (used for streaming)"""
+        queue = asyncio.Queue()
+        self._listeners.append(queue)
+        return queue
+
+    def add_trace(self, **fields) -> TraceRecord:
+        """Record a trace step (see TraceRecord for the fields)"""
+        record = TraceRecord(**fields)
+        self.trace.append(record)
+        for queue in self._listeners:
+            queue.put_nowait(record)
+        return record
+
+    def elapsed_ms(self) -> float:
+        return ms_since(self.started_at)
+
+    def remaining(self, cap: Optional[float] = None) -> Optional[float]:
+        """Seconds left in the budget (never negative), optionally capped; None without a deadline"""
+        if self.deadline is None:
+            return cap
+        left = max(self.deadline - time.perf_counter(), 0.0)
+        return left if cap is None else min(left, cap)
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def skip(self, stage: str):
+        """Note work dropped because the budget ran out"""
+        self.skipped.append(stage)
@@ -0,0 +1,184 @@
+import os
+import random
+import asyncio
+from typing import Dict, Any, List, Callable, Awaitable, Iterable, AsyncIterator, Optional
+
+_CLOSED = object()
+
+
+class Channel:
+    """Named stream of items between pipeline stages
+
+    Every subscriber gets its own asyncio.Queue and sees all items, including
+    those published before it subscribed, followed by the end of the stream
+    once the producing stage finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items: List[Any] = []
+        self.closed = False
+        self._queues: List[asyncio.Queue] = []
+
+    def publish(self, item: Any):
+        if self.closed:
+            raise RuntimeError(f"Channel {self.name!r} is closed")
+        self.items.append(item)
+        for queue in self._queues:
+            queue.put_nowait(item)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            for queue in self._queues:
+                queue.put_nowait(_CLOSED)
+
+    async def stream(self) -> AsyncIterator[Any]:
+        queue = asyncio.Queue()
+        for item in self.items:
+            queue.put_nowait(item)
+        if self.closed:
+            queue.put_nowait(_CLOSED)
+        else:
+            self._queues.append(queue)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _CLOSED:
+                    return
+                yield item
+        finally:
+            if queue in self._queues:
+                self._queues.remove(queue)
+
+    async def collect(self) -> List[Any]:
+        """All items, once the producer has finished"""
+        return [item async for item in self.stream()]
+
+
+class Stage:
+    """One step of a pipeline: what it reads, what it writes, and the coroutine doing it"""
+
+    def __init__(self, name: str, run: Callable[["Pipeline"], Awaitable[None]],
+                 consumes: Iterable[str] = (), produces: Iterable[str] = ()):
+        self.name = name
+        self.run = run
+        self.consumes = tuple(consumes)
+        self.produces = tuple(produces)
+
+
+class Pipeline:
+    """Runs stages concurrently, connected by the channels they declare
+
+    All stages start at once; a stage blocks only when it reads a channel
+    that has nothing for it yet, so a consumer works on each item as soon as
+    it is published instead of waiting for the whole upstream stage. When a
+    stage returns, the channels it produces are closed. If any stage fails,
+    the others are cancelled and the error is raised to the caller.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self.channels: Dict[str, Channel] = {}
+        for stage in stages:
+            for name in stage.produces:
+                if name in self.channels:
+                    raise ValueError(f"Channel {name!r} has more than one producer")
+                self.channels[name] = Channel(name)
+        for stage in stages:
+            for name in stage.consumes:
+                if name not in self.channels:
+                    raise ValueError(f"Stage {stage.name!r} consumes {name!r}, which nothing produces")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        producers = {name: stage for stage in self.stages for name in stage.produces}
+        visiting, done = set(), set()
+
+        def visit(stage: Stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle through {stage.name!r}")
+            visiting.add(stage.name)
+            for name in stage.consumes:
+                visit(producers[name])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+
+        for stage in self.stages:
+            visit(stage)
+
+    def emit(self, channel: str, item: Any):
+        self.channels[channel].publish(item)
+
+    def stream(self, channel: str) -> AsyncIterator[Any]:
+        return self.channels[channel].stream()
+
+    async def collect(self, channel: str) -> List[Any]:
+        return await self.channels[channel].collect()
+
+    async def _run_stage(self, stage: Stage):
+        try:
+            await stage.run(self)
+        finally:
+            for name in stage.produces:
+                self.channels[name].close()
+
+    async def run(self):
+        tasks = [asyncio.create_task(self._run_stage(stage), name=stage.name) for stage in self.stages]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class LatencyModel:
+    """Artificial delays standing in for LLM calls, off unless AGENT_LATENCY is set
+
+    AGENT_LATENCY is "off", "default" (the historical 500/300/200 ms for
+    research, analysis and synthesis) or explicit "phase=ms" pairs such as
+    "research=500,analysis=100". The analysis delay applies per analyzed
+    source. AGENT_LATENCY_JITTER spreads each delay by +/- that fraction.
+    Delays never outlast the request deadline.
+    """
+
+    DEFAULTS = {"research": 500.0, "analysis": 300.0, "synthesis": 200.0}
+
+    def __init__(self, spec: str = None, jitter: float = None):
+        spec = (spec if spec is not None else os.getenv("AGENT_LATENCY", "off")).strip().lower()
+        self.jitter = jitter if jitter is not None else float(os.getenv("AGENT_LATENCY_JITTER", 0.0))
+        self.delays_ms = self.parse(spec)
+
+    @classmethod
+    def parse(cls, spec: str) -> Dict[str, float]:
+        if spec in ("", "off", "0", "false", "none"):
+            return {}
+        if spec in ("default", "on", "true"):
+            return dict(cls.DEFAULTS)
+        delays = {}
+        for pair in spec.split(","):
+            phase, _, ms = pair.partition("=")
+            if phase.strip() not in cls.DEFAULTS:
+                raise ValueError(f"Unknown phase {phase.strip()!r} in AGENT_LATENCY")
+            delays[phase.strip()] = float(ms)
+        return delays
+
+    def delay(self, phase: str) -> float:
+        """Seconds to wait for one unit of work in a phase"""
+        ms = self.delays_ms.get(phase, 0.0)
+        if ms and self.jitter:
+            ms *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return ms / 1000
+
+    async def wait(self, phase: str, remaining: Optional[float] = None):
+        seconds = self.delay(phase)
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": bool(self.delays_ms), "delays_ms": dict(self.delays_ms), "jitter": self.jitter}
@@ -1,227 +1,531 @@
-from typing import Dict, Any
-import json
+from typing import Dict, Any, List, Callable
+import re
 import asyncio
-from datetime import datetime
-import sys
+import time
+from urllib.parse import urlparse
 import os
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
 # Try to import our MCP tools
 try:
-    from tools.mcp_tools import web_search_tool, web_fetch_tool
+    from app.tools.mcp_tools import web_search_tool, web_fetch_tool
+    from app.tools.passage_index import passage_index
+    from app.tools.dedup import url_key
     MCP_TOOLS_AVAILABLE = True
 except ImportError:
     MCP_TOOLS_AVAILABLE = False
     print("⚠️ MCP tools not available, using mock tools")
 
+from app.agents.context import ResearchContext, ms_since
+from app.agents.topics import topic_matcher
+from app.agents.pipeline import Pipeline, Stage, LatencyModel
+from app.metrics import PHASE_DURATION
+
+# Research fan-out configuration
+FETCH_TOP_K = int(os.getenv("RESEARCH_FETCH_TOP_K", 3))
+FETCH_FIRST_N = int(os.getenv("RESEARCH_FETCH_FIRST_N", 2))
+FETCH_CONCURRENCY = int(os.getenv("RESEARCH_FETCH_CONCURRENCY", 3))
+FETCH_PER_HOST = int(os.getenv("RESEARCH_FETCH_PER_HOST", 2))
+FETCH_TIMEOUT = float(os.getenv("RESEARCH_FETCH_TIMEOUT", 12))
+FETCH_MAX_CHARS = int(os.getenv("RESEARCH_FETCH_MAX_CHARS", 20000))
+
+# Evidence selection from the shared passage index
+EVIDENCE_TOP_K = int(os.getenv("EVIDENCE_TOP_K", 5))
+EVIDENCE_MIN_COVERAGE = float(os.getenv("EVIDENCE_MIN_COVERAGE", 1.0))
+# Answering from already indexed pages without searching is opt-in: containing
+# the query terms does not make a page relevant, so it also needs a minimum
+# BM25 score, and pages only count while their fetch cache entry is fresh
+INDEX_SHORTCUT_ENABLED = os.getenv("INDEX_SHORTCUT_ENABLED", "false").lower() in ("1", "true", "yes")
+EVIDENCE_MIN_SCORE = float(os.getenv("EVIDENCE_MIN_SCORE", 8.0))
+
+# Source analysis
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"\w{3,}")
+REFERENCE_DOMAINS = (".edu", ".gov", ".org", "wikipedia.org")
+
 class WorkingResearchAgents:
     def __init__(self):
-        self.trace_log = []
+        self.latency = LatencyModel()
         print("🚀 Working Research Agents initialized (dependency-safe mode)")
 
-    async def process_question(self, question: str) -> Dict[str, Any]:
-        """Process a research question using simulated multi-agent workflow"""
-        self.trace_log = []
+    async def process_question(self, question: str, context: ResearchContext = None,
+                               deadline: float = None) -> Dict[str, Any]:
+        """Process a research question using simulated multi-agent workflow
+
+        All request state lives on the ResearchContext, so concurrent calls on
+        the shared agents instance never see each other's trace. When the
+        context carries a deadline, every phase and tool call gets only the
+        time that is left, and work that no longer fits is skipped so a
+        partial answer is returned on time.
+
+        The phases run as one Pipeline: research publishes each source as
+        soon as it is fetched, analysis works on it right away, and
+        synthesis starts once the analysis summary is published.
+        """
+        ctx = context or ResearchContext(question, deadline=deadline)
         
         try:
             # Log the start of processing
-            self.trace_log.append({
-                "timestamp": datetime.now().isoformat(),
-                "agent": "orchestrator",
-                "action": "start_processing",
-                "tool": "working_crew_orchestrator",
-                "input": {"question": question, "mode": "dependency_safe"},
-                "output": {"status": "initialized"},
-                "status": "success"
-            })
+            ctx.add_trace(
+                agent="orchestrator",
+                action="start_processing",
+                tool="working_crew_orchestrator",
+                input={"question": question, "mode": "dependency_safe"},
+                output={"status": "initialized"},
+                status="success"
+            )
 
             print(f"🤖 Processing with Working Multi-Agent System: {question}")
             
-            # Simulate research phase
-            await self._simulate_research_phase(question)
-            
-            # Simulate analysis phase
-            await self._simulate_analysis_phase(question)
-            
-            # Generate final response
-            result = await self._simulate_synthesis_phase(question)
+            pipeline = Pipeline([
+                Stage("research", self._stage(ctx, "research", self._research_stage), produces=["sources"]),
+                Stage("analysis", self._stage(ctx, "analysis", self._analysis_stage),
+                      consumes=["sources"], produces=["analysis"]),
+                # Generate final response, even if only from what was collected so far
+                Stage("synthesis", self._stage(ctx, "synthesis", self._synthesis_stage),
+                      consumes=["analysis"], produces=["answer"]),
+            ])
+            await pipeline.run()
+            result = (await pipeline.collect("answer"))[0]
+            if ctx.skipped:
+                self._mark_partial(ctx, result)
             
             print(f"✅ Working multi-agent processing completed")
 
             # Log completion
-            self.trace_log.append({
-                "timestamp": datetime.now().isoformat(),
-                "agent": "orchestrator",
-                "action": "complete_processing",
-                "tool": "working_crew_orchestrator",
-                "input": {"question": question},
-                "output": {"workflow_completed": True},
-                "status": "success"
-            })
+            ctx.add_trace(
+                agent="orchestrator",
+                action="complete_processing",
+                tool="working_crew_orchestrator",
+                input={"question": question},
+                output={"workflow_completed": True},
+                status="success",
+                duration_ms=ctx.elapsed_ms()
+            )
 
+            result["request_id"] = ctx.request_id
             return result
 
         except Exception as e:
             # Error handling
-            self.trace_log.append({
-                "timestamp": datetime.now().isoformat(),
-                "agent": "orchestrator",
-                "action": "error_handling",
-                "tool": "working_crew_orchestrator",
-                "input": {"question": question},
-                "output": {"error": str(e)},
-                "status": "error"
-            })
+            ctx.add_trace(
+                agent="orchestrator",
+                action="error_handling",
+                tool="working_crew_orchestrator",
+                input={"question": question},
+                output={"error": str(e)},
+                status="error",
+                duration_ms=ctx.elapsed_ms()
+            )
 
             return {
                 "answer": f"I encountered an issue while processing: {question}",
                 "reasoning": f"Multi-agent processing error: {str(e)}",
                 "citations": [],
-                "trace": self.trace_log
+                "trace": ctx.trace,
+                "request_id": ctx.request_id
             }
 
-    async def _simulate_research_phase(self, question: str):
-        """Simulate research agent work with real or mock web tools"""
-        import asyncio
-        await asyncio.sleep(0.5)  # Simulate processing time
+    @staticmethod
+    def _stage(ctx: ResearchContext, phase: str, run: Callable) -> Callable:
+        """Bind a stage method to the request and time it as a phase"""
+        async def stage(pipe: Pipeline):
+            with PHASE_DURATION.time(phase=phase):
+                await run(ctx, pipe)
+        return stage
+
+    async def _research_stage(self, ctx: ResearchContext, pipe: Pipeline):
+        """Research agent: search, then publish each source as soon as it is fetched"""
+        question = ctx.question
+        await self.latency.wait("research", ctx.remaining())
         
-        if MCP_TOOLS_AVAILABLE:
+        if MCP_TOOLS_AVAILABLE and self._answer_from_index(ctx):
+            return
+        
+        if MCP_TOOLS_AVAILABLE and ctx.expired():
+            ctx.skip("web_search")
+        elif MCP_TOOLS_AVAILABLE:
             try:
                 # Try to use real search
-                search_results = await web_search_tool.search(question, max_results=3)
+                search_started = time.perf_counter()
+                search_results = await web_search_tool.search(
+                    question, max_results=max(3, FETCH_TOP_K), timeout=ctx.remaining()
+                )
+                ctx.search_results = search_results
                 results_count = len(search_results)
                 
-                self.trace_log.append({
-                    "timestamp": datetime.now().isoformat(),
-                    "agent": "researcher",
-                    "action": "web_search",
-                    "tool": "mcp_web_search",
-                    "input": {"query": question},
-                    "output": {"results_count": results_count, "tool_type": "real"},
-                    "status": "success"
-                })
+                ctx.add_trace(
+                    agent="researcher",
+                    action="web_search",
+                    tool="mcp_web_search",
+                    input={"query": question},
+                    output={
+                        "results_count": results_count,
+                        "tool_type": "real",
+                        "search_status": "demo" if any(r.get("status") == "demo" for r in search_results) else "success"
+                    },
+                    status="success",
+                    duration_ms=ms_since(search_started)
+                )
                 
-                # Try to fetch content from first result
-                if search_results and search_results[0].get('url'):
-                    content = await web_fetch_tool.fetch(search_results[0]['url'], max_chars=5000)
-                    self.trace_log.append({
-                        "timestamp": datetime.now().isoformat(),
-                        "agent": "researcher",
-                        "action": "web_fetch",
-                        "tool": "mcp_web_fetch",
-                        "input": {"url": search_results[0]['url']},
-                        "output": {"content_length": len(content.get('content', '')), "tool_type": "real"},
-                        "status": "success"
-                    })
+                # Fetch the top results concurrently
+                if ctx.expired():
+                    ctx.skip("web_fetch")
+                else:
+                    ctx.sources = await self._fetch_sources(
+                        ctx, search_results, max_chars=FETCH_MAX_CHARS,
+                        on_source=lambda source: pipe.emit("sources", source)
+                    )
             except Exception as e:
                 # Fallback to mock
-                self.trace_log.append({
-                    "timestamp": datetime.now().isoformat(),
-                    "agent": "researcher",
-                    "action": "web_search",
-                    "tool": "mock_web_search",
-                    "input": {"query": question},
-                    "output": {"results_count": 3, "tool_type": "mock", "fallback_reason": str(e)},
-                    "status": "success"
-                })
+                ctx.add_trace(
+                    agent="researcher",
+                    action="web_search",
+                    tool="mock_web_search",
+                    input={"query": question},
+                    output={"results_count": 3, "tool_type": "mock", "fallback_reason": str(e)},
+                    status="success"
+                )
         else:
             # Mock search
-            self.trace_log.append({
-                "timestamp": datetime.now().isoformat(),
-                "agent": "researcher",
-                "action": "web_search",
-                "tool": "mock_web_search",
-                "input": {"query": question},
-                "output": {"results_count": 3, "tool_type": "mock"},
-                "status": "success"
-            })
-
-    async def _simulate_analysis_phase(self, question: str):
-        """Simulate analysis agent work"""
-        import asyncio
-        await asyncio.sleep(0.3)
+            ctx.add_trace(
+                agent="researcher",
+                action="web_search",
+                tool="mock_web_search",
+                input={"query": question},
+                output={"results_count": 3, "tool_type": "mock"},
+                status="success"
+            )
+
+    def _answer_from_index(self, ctx: ResearchContext) -> bool:
+        """Skip network research when fresh, previously fetched pages already cover the question"""
+        if not INDEX_SHORTCUT_ENABLED:
+            return False
+        started = time.perf_counter()
+        evidence = [
+            p for p in passage_index.search(ctx.question, k=EVIDENCE_TOP_K)
+            if p["coverage"] >= EVIDENCE_MIN_COVERAGE and p["score"] >= EVIDENCE_MIN_SCORE
+            and passage_index.is_fresh(p["url"])
+        ]
+        covering = {p["url"] for p in evidence}
+        if len(covering) < FETCH_FIRST_N:
+            return False
         
-        self.trace_log.append({
-            "timestamp": datetime.now().isoformat(),
-            "agent": "analyzer",
-            "action": "validate_information",
-            "tool": "content_validator",
-            "input": {"sources": 3, "facts_to_validate": 12},
-            "output": {"validated_facts": 10, "credibility_score": 0.88, "analysis_complete": True},
-            "status": "success"
-        })
-
-    async def _simulate_synthesis_phase(self, question: str) -> Dict[str, Any]:
-        """Simulate synthesis agent work and generate final response"""
-        import asyncio
-        await asyncio.sleep(0.2)
+        ctx.evidence = evidence
+        ctx.add_trace(
+            agent="researcher",
+            action="passage_index_lookup",
+            tool="passage_index",
+            input={"query": ctx.question},
+            output={"covering_sources": len(covering), "passages": len(evidence), "network_skipped": True},
+            status="success",
+            duration_ms=ms_since(started)
+        )
+        return True
+
+    async def _fetch_sources(self, ctx: ResearchContext, search_results: List[Dict[str, Any]], max_chars: int = 5000,
+                             on_source: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """Fetch the top-K search results concurrently and keep the first N that succeed
+
+        Fetches are bounded by a global semaphore and a per-host cap. As soon as
+        FETCH_FIRST_N pages have been fetched, or FETCH_TIMEOUT or the request
+        deadline passes, the remaining fetches are cancelled so one slow host
+        cannot stall the question. Pages that turn out to duplicate another
+        page fetched for this question are traced but neither counted nor kept.
+        Every kept page is also handed to on_source the moment it arrives.
+        """
+        urls = []
+        seen = set()
+        for result in search_results:
+            url = result.get("url")
+            if url and url_key(url) not in seen:
+                seen.add(url_key(url))
+                urls.append(url)
+        urls = urls[:FETCH_TOP_K]
+        if not urls:
+            return []
+
+        fetch_limit = asyncio.Semaphore(FETCH_CONCURRENCY)
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch_one(url: str) -> Dict[str, Any]:
+            host = urlparse(url).netloc
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(FETCH_PER_HOST))
+            queued = time.perf_counter()
+            async with fetch_limit, host_limit:
+                started = time.perf_counter()
+                content = await web_fetch_tool.fetch(url, max_chars=max_chars, timeout=ctx.remaining())
+            return {
+                "content": content,
+                "wait_ms": round((started - queued) * 1000, 2),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+
+        tasks = {asyncio.ensure_future(fetch_one(url)): url for url in urls}
+        pending = set(tasks)
+        fetched: Dict[str, Dict[str, Any]] = {}
+        succeeded = 0
+        deadline = time.perf_counter() + ctx.remaining(FETCH_TIMEOUT)
+
+        try:
+            while pending and succeeded < FETCH_FIRST_N:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                # Originals before their duplicates when both finish together
+                for task in sorted(done, key=self._is_duplicate_fetch):
+                    url = tasks[task]
+                    try:
+                        fetch = task.result()
+                    except Exception as e:
+                        ctx.add_trace(
+                            agent="researcher",
+                            action="web_fetch",
+                            tool="mcp_web_fetch",
+                            input={"url": url},
+                            output={"error": str(e), "tool_type": "real"},
+                            status="error"
+                        )
+                        continue
+
+                    content = fetch["content"]
+                    duplicate_of = content.get("duplicate_of")
+                    duplicate = any(
+                        page.get("url") in (duplicate_of, content.get("url")) for page in fetched.values()
+                    )
+                    if not duplicate:
+                        fetched[url] = content
+                        if content.get("status") == "success":
+                            succeeded += 1
+                        if on_source is not None:
+                            on_source(content)
+                    ctx.add_trace(
+                        agent="researcher",
+                        action="web_fetch",
+                        tool="mcp_web_fetch",
+                        input={"url": url},
+                        output={
+                            "content_length": len(content.get('content', '')),
+                            "tool_type": "real",
+                            "fetch_status": content.get("status"),
+                            "duplicate_of": duplicate_of,
+                            "wait_ms": fetch["wait_ms"]
+                        },
+                        status="success",
+                        duration_ms=fetch["duration_ms"]
+                    )
+        finally:
+            if succeeded >= FETCH_FIRST_N:
+                reason = "enough sources"
+            elif ctx.expired():
+                reason = "deadline exceeded"
+            else:
+                reason = "fetch timeout"
+            for task in pending:
+                task.cancel()
+                if reason == "deadline exceeded":
+                    ctx.skip(f"web_fetch {tasks[task]}")
+                ctx.add_trace(
+                    agent="researcher",
+                    action="web_fetch",
+                    tool="mcp_web_fetch",
+                    input={"url": tasks[task]},
+                    output={"cancelled": True, "reason": reason},
+                    status="skipped"
+                )
+
+        # Keep the search ranking order for downstream phases
+        return [fetched[url] for url in urls if url in fetched]
+
+    @staticmethod
+    def _is_duplicate_fetch(task: asyncio.Task) -> bool:
+        return task.exception() is None and task.result()["content"].get("duplicate_of") is not None
+
+    async def _analysis_stage(self, ctx: ResearchContext, pipe: Pipeline):
+        """Analysis agent: check each source as it arrives, then publish a summary"""
+        started = time.perf_counter()
+        terms = set(_WORD_RE.findall(ctx.question.lower()))
+        findings = []
+        async for source in pipe.stream("sources"):
+            if ctx.expired():
+                ctx.skip(f"analysis {source.get('url')}")
+                continue
+            source_started = time.perf_counter()
+            await self.latency.wait("analysis", ctx.remaining())
+            finding = self._analyze_source(source, terms)
+            findings.append(finding)
+            ctx.add_trace(
+                agent="analyzer",
+                action="analyze_source",
+                tool="content_validator",
+                input={"url": source.get("url")},
+                output=finding,
+                status="success",
+                duration_ms=ms_since(source_started)
+            )
+
+        if not findings:
+            if ctx.expired():
+                ctx.skip("analysis")
+                pipe.emit("analysis", ctx.analysis)
+                return
+            # Nothing fetched (index answer or mock tools): still one unit of analysis
+            await self.latency.wait("analysis", ctx.remaining())
+
+        ctx.analysis = {
+            "sources_analyzed": len(findings),
+            "validated_facts": sum(f["relevant_facts"] for f in findings),
+            "credibility_score": round(sum(f["credibility"] for f in findings) / len(findings), 2) if findings else 0.0,
+            "analysis_complete": not any(stage.startswith("analysis") for stage in ctx.skipped)
+        }
+        ctx.add_trace(
+            agent="analyzer",
+            action="validate_information",
+            tool="content_validator",
+            input={"sources": len(findings), "facts_to_validate": sum(f["facts"] for f in findings)},
+            output=ctx.analysis,
+            status="success",
+            duration_ms=ms_since(started)
+        )
+        pipe.emit("analysis", ctx.analysis)
+
+    @staticmethod
+    def _analyze_source(source: Dict[str, Any], terms: set) -> Dict[str, Any]:
+        """Count the sentences of a page that mention the question and score the source"""
+        sentences = [s for s in _SENTENCE_RE.split(source.get("content", "")) if s.strip()]
+        relevant = sum(1 for s in sentences if terms.intersection(_WORD_RE.findall(s.lower())))
+        url = source.get("url") or ""
+        host = urlparse(url).hostname or ""
+        credibility = 0.7 if source.get("status") == "success" else 0.2
+        if url.startswith("https://"):
+            credibility += 0.1
+        if host.endswith(REFERENCE_DOMAINS):
+            credibility += 0.1
+        return {
+            "url": url,
+            "facts": len(sentences),
+            "relevant_facts": relevant,
+            "credibility": round(min(credibility, 1.0), 2),
+        }
+
+    async def _synthesis_stage(self, ctx: ResearchContext, pipe: Pipeline):
+        """Synthesis agent: wait for the analysis, select evidence and publish the answer"""
+        await pipe.collect("analysis")
+        pipe.emit("answer", await self._synthesize(ctx))
+
+    async def _synthesize(self, ctx: ResearchContext) -> Dict[str, Any]:
+        """Select evidence and generate the final response"""
+        question = ctx.question
+        started = time.perf_counter()
+        await self.latency.wait("synthesis", ctx.remaining())
+        
+        # Evidence already chosen by the index shortcut is kept as it is
+        if MCP_TOOLS_AVAILABLE and not ctx.evidence:
+            evidence_started = time.perf_counter()
+            ctx.evidence = passage_index.search(question, k=EVIDENCE_TOP_K, urls=self._source_urls(ctx))
+            ctx.add_trace(
+                agent="synthesizer",
+                action="select_evidence",
+                tool="passage_index",
+                input={"question": question, "top_k": EVIDENCE_TOP_K},
+                output={
+                    "passages": len(ctx.evidence),
+                    "sources": list(dict.fromkeys(p["url"] for p in ctx.evidence)),
+                    "top_score": ctx.evidence[0]["score"] if ctx.evidence else 0.0
+                },
+                status="success",
+                duration_ms=ms_since(evidence_started)
+            )
         
-        self.trace_log.append({
-            "timestamp": datetime.now().isoformat(),
-            "agent": "synthesizer",
-            "action": "generate_response",
-            "tool": "response_generator",
-            "input": {"question": question, "validated_facts": 10},
-            "output": {"answer_generated": True, "citations_created": 3, "reasoning_provided": True},
-            "status": "success"
-        })
+        ctx.add_trace(
+            agent="synthesizer",
+            action="generate_response",
+            tool="response_generator",
+            input={"question": question, "validated_facts": ctx.analysis.get("validated_facts", 0)},
+            output={"answer_generated": True, "citations_created": 3, "reasoning_provided": True},
+            status="success",
+            duration_ms=ms_since(started)
+        )
 
         # Generate topic-specific intelligent responses
-        return self._generate_intelligent_response(question)
+        return self._generate_intelligent_response(ctx)
+
+    @staticmethod
+    def _source_urls(ctx: ResearchContext) -> set:
+        """Indexed URLs of the pages this request fetched
+
+        The passage index is shared by every request, so evidence is ranked
+        only among these; otherwise pages fetched for earlier, unrelated
+        questions would be cited.
+        """
+        urls = set()
+        for source in ctx.sources:
+            if source.get("status") == "success":
+                urls.add(source.get("url"))
+                urls.add(source.get("duplicate_of"))
+        urls.discard(None)
+        return urls
+
+    def _evidence_citations(self, ctx: ResearchContext) -> List[Dict[str, Any]]:
+        """One citation per source among the top-ranked evidence passages"""
+        citations = {}
+        for passage in ctx.evidence:
+            if passage["url"] not in citations:
+                snippet = passage["passage"]
+                citations[passage["url"]] = {
+                    "url": passage["url"],
+                    "title": passage["title"],
+                    "snippet": snippet[:200] + ("..." if len(snippet) > 200 else "")
+                }
+        return list(citations.values())
+
+    def _collected_citations(self, ctx: ResearchContext) -> List[Dict[str, Any]]:
+        """Citations for whatever this request gathered: evidence, fetched pages, then search hits"""
+        citations = self._evidence_citations(ctx)
+        if not citations:
+            citations = [
+                {"url": s["url"], "title": s["title"], "snippet": s["content"][:200]}
+                for s in ctx.sources if s.get("status") == "success"
+            ]
+        if not citations:
+            citations = [
+                {"url": r["url"], "title": r["title"], "snippet": r.get("snippet", "")[:200]}
+                for r in ctx.search_results if r.get("url")
+            ]
+        return citations
+
+    def _mark_partial(self, ctx: ResearchContext, result: Dict[str, Any]):
+        """Flag a response cut short by the deadline and cite only what was collected"""
+        result["partial"] = True
+        result["citations"] = self._collected_citations(ctx)
+        ctx.add_trace(
+            agent="orchestrator",
+            action="deadline_exceeded",
+            tool="deadline_budget",
+            input={"question": ctx.question},
+            output={"skipped": list(ctx.skipped), "citations_collected": len(result["citations"])},
+            status="partial",
+            duration_ms=ctx.elapsed_ms()
+        )
+
+    def _generate_intelligent_response(self, ctx: ResearchContext) -> Dict[str, Any]:
+        """Generate intelligent responses based on question content
 
-    def _generate_intelligent_response(self, question: str) -> Dict[str, Any]:
-        """Generate intelligent responses based on question content"""
-        question_lower = question.lower()
+        Topic answers come from the topics data file; questions matching no
+        topic get the default answer, cited from the evidence when there is any.
+        """
+        question = ctx.question
+        response = topic_matcher.render(topic_matcher.match(question), question)
+        citations = response["citations"]
+        if response["topic"] == "default":
+            citations = self._evidence_citations(ctx) or citations
         
-        if "python" in question_lower:
-            return {
-                "answer": "Python is a high-level, interpreted programming language created by Guido van Rossum and first released in 1991. It's known for its simple, readable syntax that emphasizes code clarity and allows developers to express concepts in fewer lines of code. Python supports multiple programming paradigms including procedural, object-oriented, and functional programming. It's widely used for web development (Django, Flask), data science (pandas, NumPy), artificial intelligence (TensorFlow, PyTorch), automation, scientific computing, and system administration. Python's extensive standard library and large ecosystem of third-party packages make it versatile for many applications.",
-                "reasoning": "This comprehensive answer was generated through our multi-agent research system: 1) Research Agent searched for authoritative information about Python programming language, including its history, features, and applications, 2) Analyzer Agent validated the technical accuracy of the information and identified key characteristics that define Python, 3) Synthesizer Agent combined all validated findings into a structured response covering Python's definition, creator, key features, paradigms, and primary use cases.",
-                "citations": [
-                    {"url": "https://www.python.org/doc/essays/blurb/", "title": "What is Python? Executive Summary", "snippet": "Python is an interpreted, object-oriented, high-level programming language with dynamic semantics."},
-                    {"url": "https://en.wikipedia.org/wiki/Python_(programming_language)", "title": "Python (programming language) - Wikipedia", "snippet": "Python is a high-level, general-purpose programming language emphasizing code readability."},
-                    {"url": "https://docs.python.org/3/tutorial/", "title": "The Python Tutorial", "snippet": "Python is an easy to learn, powerful programming language with efficient high-level data structures."}
-                ],
-                "trace": self.trace_log
-            }
-            
-        elif "machine learning" in question_lower or "ml" in question_lower:
-            return {
-                "answer": "Machine Learning (ML) is a subset of artificial intelligence that enables computers to learn and improve their performance on tasks through experience, without being explicitly programmed for each specific task. It uses algorithms to identify patterns in data, make predictions, and automate decision-making processes. There are three main types: 1) Supervised Learning - uses labeled training data to learn mappings from inputs to outputs, 2) Unsupervised Learning - finds hidden patterns in unlabeled data, and 3) Reinforcement Learning - learns through trial and error using rewards and penalties. Common applications include recommendation systems, image recognition, natural language processing, fraud detection, and predictive analytics.",
-                "reasoning": "Our multi-agent system processed this machine learning query systematically: 1) Research Agent gathered comprehensive information about ML fundamentals, types, and real-world applications from authoritative sources, 2) Analyzer Agent categorized the information into core concepts, methodologies, and practical applications while verifying technical accuracy, 3) Synthesizer Agent structured the response to provide a clear definition, explain the three main learning paradigms, and highlight practical applications that demonstrate ML's impact.",
-                "citations": [
-                    {"url": "https://en.wikipedia.org/wiki/Machine_learning", "title": "Machine learning - Wikipedia", "snippet": "Machine learning is a method of data analysis that automates analytical model building."},
-                    {"url": "https://www.ibm.com/topics/machine-learning", "title": "What is Machine Learning? | IBM", "snippet": "Machine learning is a branch of AI focused on building applications that learn from data."},
-                    {"url": "https://www.coursera.org/learn/machine-learning", "title": "Machine Learning Course - Stanford", "snippet": "Learn about the most effective machine learning techniques and gain practice implementing them."}
-                ],
-                "trace": self.trace_log
-            }
-            
-        elif "artificial intelligence" in question_lower or "ai" in question_lower:
-            return {
-                "answer": "Artificial Intelligence (AI) refers to the development of computer systems that can perform tasks typically requiring human intelligence, such as visual perception, speech recognition, decision-making, and language translation. AI encompasses various approaches including machine learning, deep learning, natural language processing, computer vision, and robotics. Modern AI systems can be categorized as narrow AI (designed for specific tasks like chess playing or image recognition) or general AI (theoretical systems with human-like cognitive abilities). AI applications are widespread across industries including healthcare (medical diagnosis), finance (algorithmic trading), transportation (autonomous vehicles), entertainment (game AI), and customer service (chatbots).",
-                "reasoning": "This AI explanation was developed through our systematic multi-agent approach: 1) Research Agent collected information about AI definitions, approaches, categories, and applications from academic and industry sources, 2) Analyzer Agent organized the information into logical categories (definition, approaches, types, applications) and validated the accuracy of technical concepts, 3) Synthesizer Agent created a comprehensive overview that explains what AI is, how it works, its different forms, and its real-world impact across various sectors.",
-                "citations": [
-                    {"url": "https://en.wikipedia.org/wiki/Artificial_intelligence", "title": "Artificial intelligence - Wikipedia", "snippet": "AI is intelligence demonstrated by machines, in contrast to natural intelligence displayed by humans."},
-                    {"url": "https://www.ibm.com/topics/artificial-intelligence", "title": "What is Artificial Intelligence (AI)? | IBM", "snippet": "Artificial intelligence leverages computers and machines to mimic human problem-solving and decision-making."},
-                    {"url": "https://ai.stanford.edu/~nilsson/aibook.html", "title": "The Quest for Artificial Intelligence - Stanford", "snippet": "A comprehensive introduction to the field of artificial intelligence."}
-                ],
-                "trace": self.trace_log
-            }
-            
-        else:
-            return {
-                "answer": f"Based on our advanced multi-agent research system, I've thoroughly analyzed your question: '{question}'. Our system successfully employed a three-stage workflow where specialized agents collaborated to provide this comprehensive response. The Research Agent gathered relevant information using web search capabilities, the Analyzer Agent validated and structured the findings for accuracy and relevance, and the Synthesizer Agent generated this final response with proper reasoning and citations. This demonstrates the full multi-agent workflow operating effectively in dependency-safe mode while maintaining high-quality output standards.",
-                "reasoning": f"The multi-agent system processed your query '{question}' through our sophisticated three-agent workflow: 1) Research Agent systematically searched for and gathered relevant information using both real web tools (when available) and fallback mechanisms to ensure comprehensive coverage, 2) Analyzer Agent applied rigorous validation processes to verify information accuracy, assess source credibility, and organize findings into logical structures, 3) Synthesizer Agent combined all validated research into this coherent response, ensuring clarity, completeness, and proper citation formatting. This demonstrates effective agent coordination and robust error handling in our dependency-safe implementation.",
-                "citations": [
-                    {"url": "https://docs.crewai.com/concepts/agents", "title": "CrewAI Agents Documentation", "snippet": "CrewAI agents work collaboratively to accomplish complex tasks through role-based specialization."},
-                    {"url": "https://github.com/crewAIInc/crewAI", "title": "CrewAI GitHub Repository", "snippet": "Framework for orchestrating role-playing, autonomous AI agents for collaborative intelligence."},
-                    {"url": "https://arxiv.org/abs/2308.08155", "title": "Multi-Agent Systems for AI Research", "snippet": "Multi-agent systems demonstrate superior performance in complex reasoning tasks."}
-                ],
-                "trace": self.trace_log
-            }
+        return {
+            "answer": response["answer"],
+            "reasoning": response["reasoning"],
+            "citations": citations,
+            "trace": ctx.trace
+        }
 
 # Initialize the research agents
 research_agents = WorkingResearchAgents()
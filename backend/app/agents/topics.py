@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import time
+import unicodedata
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_TOPICS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "topics.json")
+
+# Used only if the topics file cannot be loaded at all
+BUILTIN_DEFAULT = {
+    "id": "default",
+    "answer": "Our research agents analyzed your question: '{question}'.",
+    "reasoning": "The question was processed by the research, analysis and synthesis agents.",
+    "citations": [],
+}
+
+
+def keyword_tokens(text: str) -> List[str]:
+    """Case-folded words with all punctuation treated as a separator"""
+    return re.sub(r"[^\w\s]", " ", unicodedata.normalize("NFKC", text).casefold()).split()
+
+
+# Key under which a trie node stores the best (priority, topic id) ending there
+_END = ""
+
+
+class TopicMatcher:
+    """Picks the canned topic answer for a question from a JSON data file
+
+    Keywords are compiled into a trie over tokens, so matching walks the
+    trie from each token of the question; the cost depends on the question
+    and the longest keyword, not on how many topics exist. Tokens come from
+    keyword_tokens, so keywords only match whole words ("ai" does not match
+    "explain"). When several topics match, the one with the lowest priority
+    (file order by default) wins.
+
+    The file is re-read when its modification time changes, checked at most
+    every reload_interval seconds, so topics can be edited on a running
+    server. An invalid file is reported and the previous topics are kept.
+    """
+
+    def __init__(self, path: str = None, reload_interval: float = None):
+        self.path = path or os.getenv("TOPICS_FILE") or DEFAULT_TOPICS_FILE
+        self.reload_interval = (reload_interval if reload_interval is not None
+                                else float(os.getenv("TOPICS_RELOAD_INTERVAL", 2.0)))
+        self._trie: Dict[str, Any] = {}
+        self._keywords = 0
+        self._topics: Dict[str, Dict[str, Any]] = {}
+        self._default: Dict[str, Any] = BUILTIN_DEFAULT
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+
+        self.loads = 0
+        self.load_errors = 0
+        self.matches: Dict[str, int] = {}
+        self.load()
+
+    def load(self) -> bool:
+        """(Re)build the index from the topics file; keeps the old one on error"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            topics, trie, keywords = self._build(data)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.load_errors += 1
+            print(f"⚠️ Could not load topics from {self.path}: {e}")
+            return False
+
+        # Swap everything at once so a match never sees half an update
+        self._topics, self._trie, self._keywords = topics, trie, keywords
+        self._default = dict(BUILTIN_DEFAULT, **data.get("default", {}), id="default")
+        self._mtime = mtime
+        self.loads += 1
+        print(f"📚 Loaded {len(topics)} topics from {self.path}")
+        return True
+
+    @staticmethod
+    def _build(data: Dict[str, Any]):
+        topics: Dict[str, Dict[str, Any]] = {}
+        trie: Dict[str, Any] = {}
+        keywords = 0
+        for position, topic in enumerate(data["topics"]):
+            topic_id = topic["id"]
+            if topic_id in topics:
+                raise ValueError(f"duplicate topic id {topic_id!r}")
+            for field in ("answer", "reasoning"):
+                if not isinstance(topic[field], str):
+                    raise ValueError(f"topic {topic_id!r} needs a string {field}")
+            priority = int(topic.get("priority", position))
+            topics[topic_id] = dict(topic, citations=list(topic.get("citations", [])))
+            for keyword in topic["keywords"]:
+                tokens = keyword_tokens(keyword)
+                if not tokens:
+                    raise ValueError(f"topic {topic_id!r} has an empty keyword")
+                node = trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                if _END not in node or (priority, topic_id) < node[_END]:
+                    node[_END] = (priority, topic_id)
+                keywords += 1
+        return topics, trie, keywords
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.load()
+
+    def match(self, question: str) -> Dict[str, Any]:
+        """The best matching topic, or the default topic when nothing matches"""
+        self.maybe_reload()
+        tokens = keyword_tokens(question)
+        trie = self._trie
+        best: Optional[Tuple[int, int, str]] = None
+        for start in range(len(tokens)):
+            node = trie
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                if _END in node:
+                    priority, topic_id = node[_END]
+                    candidate = (priority, start, topic_id)
+                    if best is None or candidate < best:
+                        best = candidate
+
+        topic = self._topics[best[2]] if best is not None else self._default
+        self.matches[topic["id"]] = self.matches.get(topic["id"], 0) + 1
+        return topic
+
+    @staticmethod
+    def render(topic: Dict[str, Any], question: str) -> Dict[str, Any]:
+        """Answer, reasoning and citations with {question} filled in"""
+        return {
+            "topic": topic["id"],
+            "answer": topic["answer"].replace("{question}", question),
+            "reasoning": topic["reasoning"].replace("{question}", question),
+            "citations": [dict(citation) for citation in topic.get("citations", [])],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "topics": len(self._topics),
+            "keywords": self._keywords,
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "matches": dict(self.matches),
+        }
+
+# Initialize the shared topic matcher
+topic_matcher = TopicMatcher()
@@ -0,0 +1,100 @@
+import os
+import gzip
+import json
+import asyncio
+import importlib.util
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.responses import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Imported on first use so servers that never negotiate br do not pay for it
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+# Bodies larger than this are compressed in a worker thread instead of on the event loop
+COMPRESSION_OFFLOAD_BYTES = int(os.getenv("COMPRESSION_OFFLOAD_BYTES", 256 * 1024))
+
+
+def dumps(data: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson when installed, the json module otherwise"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(data: Any) -> str:
+    return dumps(data).decode("utf-8")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported content coding for an Accept-Encoding header, or None for identity
+
+    Honors q-values (q=0 refuses a coding, "*" covers unlisted ones) and
+    prefers br over gzip when the client rates them equally.
+    """
+    if not COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding.strip()] = q
+    supported = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+    best: Tuple[float, int, Optional[str]] = (0.0, 0, None)
+    for rank, coding in enumerate(reversed(supported), start=1):
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > 0 and (q, rank) > best[:2]:
+            best = (q, rank, coding)
+    return best[2]
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        import brotli
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+async def json_response(data: Any, accept_encoding: Optional[str] = None, status_code: int = 200,
+                        headers: Dict[str, str] = None) -> Response:
+    """Encode a JSON body, compressed when the client accepts it and it is worth it
+
+    This replaces FastAPI's default path (jsonable_encoder, then json.dumps)
+    for large responses whose content is already plain dicts and lists.
+    """
+    body = dumps(data)
+    headers = dict(headers or {}, Vary="Accept-Encoding")
+    coding = negotiate(accept_encoding) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if coding is not None:
+        if len(body) > COMPRESSION_OFFLOAD_BYTES:
+            body = await asyncio.to_thread(compress, body, coding)
+        else:
+            body = compress(body, coding)
+        headers["Content-Encoding"] = coding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "json_encoder": "orjson" if ORJSON_AVAILABLE else "json",
+        "compression_enabled": COMPRESSION_ENABLED,
+        "codings": (["br"] if BROTLI_AVAILABLE else []) + ["gzip"],
+        "min_bytes": COMPRESSION_MIN_BYTES,
+    }
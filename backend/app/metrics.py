@@ -0,0 +1,175 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Tuple
+
+# Latency buckets in seconds, from cache hits up to the slowest upstream timeouts
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Dict[str, str] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(key)} {value}" for key, value in self.values.items()]
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self.values[_label_key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in flight"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        lines += [f"{self.name}{_format_labels(key)} {value}" for key, value in self.values.items()]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series: Dict[LabelKey, Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            self.series[key] = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["counts"][i] += 1
+                break
+        series["sum"] += value
+        series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the monotonic duration of the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': str(bound)})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal in-process metrics registry rendered in Prometheus text format
+
+    Besides counters, gauges and histograms, components can register a
+    stats() callable; its numeric fields are exported at scrape time, which
+    is how cache hit rates and pool state reach /metrics. Fields named
+    *_total are running counts and are typed counter, the rest gauge. A
+    stats field whose name is already taken by a registered metric (or an
+    earlier stats field) is skipped: Prometheus rejects a scrape that
+    declares a family twice.
+    """
+
+    def __init__(self, prefix: str = "research"):
+        self.prefix = prefix
+        self._metrics: Dict[str, Any] = {}
+        self._stats: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def _get(self, cls, name: str, help: str, **kwargs):
+        full_name = f"{self.prefix}_{name}"
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            metric = cls(full_name, help, **kwargs)
+            self._metrics[full_name] = metric
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def register_stats(self, name: str, stats: Callable[[], Dict[str, Any]]):
+        self._stats.append((f"{self.prefix}_{name}", stats))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        families = set(self._metrics)
+        for name, stats in self._stats:
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Metrics collection failed for {name}: {e}")
+                continue
+            for field, value in values.items():
+                family = f"{name}_{field}"
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or family in families:
+                    continue
+                families.add(family)
+                kind = "counter" if field.endswith("_total") else "gauge"
+                lines.append(f"# TYPE {family} {kind}")
+                lines.append(f"{family} {value}")
+        return "\n".join(lines) + "\n"
+
+# Initialize the process-wide registry and the core series
+metrics = MetricsRegistry()
+
+PHASE_DURATION = metrics.histogram("phase_duration_seconds", "Duration of each research pipeline phase")
+TOOL_DURATION = metrics.histogram("tool_duration_seconds", "Duration of each MCP tool call")
+TOOL_ERRORS = metrics.counter("tool_errors_total", "MCP tool calls that fell back after an error")
+TOOL_IN_FLIGHT = metrics.gauge("tool_in_flight", "MCP tool calls currently running")
+UPSTREAM_DURATION = metrics.histogram("upstream_request_duration_seconds", "Outbound HTTP request duration per host")
+UPSTREAM_ERRORS = metrics.counter("upstream_errors_total", "Outbound HTTP requests that failed per host")
+REQUESTS_IN_FLIGHT = metrics.gauge("requests_in_flight", "API requests currently being processed")
+REQUESTS_TOTAL = metrics.counter("requests_total", "API requests by endpoint and outcome")
+REQUEST_DURATION = metrics.histogram("request_duration_seconds", "End-to-end API request duration")
@@ -0,0 +1,159 @@
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Tuple
+
+from app.metrics import metrics
+
+ADMISSION_QUEUE_DEPTH = metrics.gauge("admission_queue_depth", "Requests waiting for a processing slot")
+ADMISSION_ACTIVE = metrics.gauge("admission_active", "Requests holding a processing slot")
+ADMISSION_SHED = metrics.counter("admission_shed_total", "Requests rejected by admission control")
+ADMISSION_WAIT = metrics.histogram("admission_wait_seconds", "Time admitted requests spent queued")
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed instead of admitted
+
+    status_code is 429 when the wait queue is full and 503 when the request
+    waited past its queue deadline; retry_after is a whole number of seconds.
+    """
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"Server overloaded: {reason}")
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, prioritized wait queue
+
+    Up to max_concurrent requests run at once. Later arrivals wait in a queue
+    ordered by priority lane and then arrival; a freed slot is handed straight
+    to the next waiter. When the queue is full new arrivals are rejected at
+    once, and a waiter that is not admitted before its queue deadline is
+    rejected too, so admitted requests keep their latency under overload.
+    Lower lanes may only use part of the queue, so they are shed first.
+    """
+
+    def __init__(self, max_concurrent: int = None, max_queue: int = None, queue_timeout: float = None,
+                 low_priority_share: float = None):
+        self.enabled = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.max_concurrent = max_concurrent or int(os.getenv("ADMISSION_MAX_CONCURRENT", 64))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("ADMISSION_MAX_QUEUE", 128))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 10))
+        self.low_priority_share = (low_priority_share if low_priority_share is not None
+                                   else float(os.getenv("ADMISSION_LOW_PRIORITY_SHARE", 0.5)))
+
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Moving average of slot hold time, used to estimate Retry-After
+        self._service_time = 1.0
+
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0}
+
+    def _queue_limit(self, rank: int) -> int:
+        if rank >= PRIORITIES["low"]:
+            return int(self.max_queue * self.low_priority_share)
+        return self.max_queue
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is expected to drain"""
+        backlog = (len(self._waiters) + 1) / self.max_concurrent
+        return min(max(math.ceil(backlog * self._service_time), 1), 60)
+
+    def _reject(self, reason: str, status_code: int, priority: str) -> OverloadedError:
+        self.shed[reason] += 1
+        ADMISSION_SHED.inc(reason=reason, priority=priority)
+        return OverloadedError(reason, status_code, self.retry_after())
+
+    def _update_gauges(self):
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+        ADMISSION_ACTIVE.set(self._active)
+
+    async def acquire(self, priority: str = "normal", timeout: float = None):
+        rank = PRIORITIES[priority]
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            self._update_gauges()
+            ADMISSION_WAIT.observe(0.0)
+            return
+        if len(self._waiters) >= self._queue_limit(rank):
+            raise self._reject("queue_full", 429, priority)
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (rank, next(self._sequence), waiter)
+        heapq.heappush(self._waiters, entry)
+        self.queued += 1
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, timeout if timeout is not None else self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(entry)
+            raise self._reject("queue_timeout", 503, priority)
+        except asyncio.CancelledError:
+            # Caller went away; give back a slot that was handed over meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(entry)
+            raise
+        self.admitted += 1
+        ADMISSION_WAIT.observe(time.perf_counter() - started)
+
+    def _discard(self, entry):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        self._update_gauges()
+
+    def release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                # Hand the slot straight over; the active count is unchanged
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self._active -= 1
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "normal", timeout: float = None):
+        """Hold a processing slot for the enclosed block, or raise OverloadedError"""
+        if not self.enabled:
+            yield
+            return
+        await self.acquire(priority, timeout)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.perf_counter() - started)
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed["queue_full"],
+            "shed_queue_timeout": self.shed["queue_timeout"],
+            "service_time_seconds": round(self._service_time, 3),
+        }
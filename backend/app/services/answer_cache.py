@@ -0,0 +1,248 @@
+import os
+import re
+import time
+import struct
+import random
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from app.tools.cache import normalize_query
+from app.tools.shared_store import shared_store
+from app.tracing import TraceRecord
+
+# Mersenne prime used for the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+
+# Words, keeping symbols inside them (c++, c#, node.js, 3.11)
+_WORD_RE = re.compile(r"\w[\w+#.]*\w|\w[+#]*")
+
+
+def anchors(question: str) -> frozenset:
+    """Numbers and likely named entities (capitalized words after the first) in a question
+
+    Two questions differing in any of these ask about different things
+    ("Australia" vs "Austria", "2023" vs "2024"), however similar the rest is.
+    """
+    words = _WORD_RE.findall(question)
+    return frozenset(
+        word.casefold() for position, word in enumerate(words)
+        if any(c.isdigit() for c in word) or (position > 0 and word[0].isupper())
+    )
+
+
+class MinHasher:
+    """MinHash signatures over word unigrams and bigrams of a normalized question"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> Set[int]:
+        words = _WORD_RE.findall(text)
+        pieces = words + [f"{a} {b}" for a, b in zip(words, words[1:])] or [text]
+        return {
+            struct.unpack("<Q", hashlib.blake2b(piece.encode("utf-8"), digest_size=8).digest())[0]
+            for piece in pieces
+        }
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        shingles = self.shingles(text)
+        return tuple(min((a * s + b) % _PRIME for s in shingles) for a, b in self._perms)
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity: fraction of matching signature slots"""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class AnswerCache:
+    """Cache of finished research responses keyed by question
+
+    Exact matches use the normalized question. Near-duplicate matching is
+    off by default (ANSWER_CACHE_NEAR_MATCH): a near hit returns an answer
+    written for another question. When on, paraphrases are found with a
+    MinHash LSH index over word shingles: signatures are split into bands
+    and only questions sharing a band bucket are compared, so lookups stay
+    sublinear in the number of cached answers. A candidate must reach the
+    similarity threshold and mention exactly the same numbers and named
+    entities. Entries expire after a TTL and the least recently used entry
+    is evicted when the cache is full.
+
+    With the shared store enabled, answers are also published to the other
+    worker processes; aget falls back to them for exact matches.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None, threshold: float = None,
+                 near_match: bool = None, num_perm: int = 64, bands: int = 16):
+        self.enabled = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.near_match = (near_match if near_match is not None
+                           else os.getenv("ANSWER_CACHE_NEAR_MATCH", "false").lower() in ("1", "true", "yes"))
+        self.max_entries = max_entries or int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1000))
+        self.ttl = ttl if ttl is not None else float(os.getenv("ANSWER_CACHE_TTL", 3600))
+        self.threshold = threshold if threshold is not None else float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.9))
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band_key in self._band_keys(entry["signature"]):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _live(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["stored_at"] > self.ttl:
+            self._remove(key)
+            return None
+        return entry
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached response marked with a cache-hit trace entry"""
+        if not self.enabled:
+            return None
+        key = normalize_query(question)
+        entry = self._live(key)
+        match, similarity = "exact", 1.0
+
+        if entry is None and self.near_match:
+            signature = self.hasher.signature(key)
+            question_anchors = anchors(question)
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self._buckets.get(band_key, ()))
+            best_key, similarity = None, 0.0
+            for candidate in candidates:
+                candidate_entry = self._live(candidate)
+                if candidate_entry is None or candidate_entry["anchors"] != question_anchors:
+                    continue
+                score = MinHasher.similarity(signature, candidate_entry["signature"])
+                if score > similarity:
+                    best_key, similarity = candidate, score
+            if best_key is not None and similarity >= self.threshold:
+                entry, match = self._entries[best_key], "near_duplicate"
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if match == "exact":
+            self.exact_hits += 1
+        else:
+            self.near_hits += 1
+        return self._hit(question, entry, match, similarity)
+
+    async def aget(self, question: str) -> Optional[Dict[str, Any]]:
+        """get(), then the answers other worker processes stored for the same question"""
+        result = self.get(question)
+        if result is not None or not self.enabled or not shared_store.enabled:
+            return result
+        shared = await shared_store.get("answer", normalize_query(question))
+        if shared is None:
+            return None
+        self.shared_hits += 1
+        stored = dict(shared["result"], trace=[TraceRecord.from_dict(r) for r in shared["result"]["trace"]])
+        entry = self._insert(shared["question"], stored, shared["stored_at"])
+        return self._hit(question, entry, "shared", 1.0)
+
+    def _hit(self, question: str, entry: Dict[str, Any], match: str, similarity: float) -> Dict[str, Any]:
+        """A copy of a cached response marked with a cache-hit trace entry"""
+        self._entries.move_to_end(entry["key"])
+        result = dict(entry["result"])
+        result["trace"] = [TraceRecord(
+            agent="orchestrator",
+            action="answer_cache_hit",
+            tool="answer_cache",
+            input={"question": question},
+            output={
+                "match": match,
+                "similarity": round(similarity, 3),
+                "cached_question": entry["question"],
+                "age_seconds": round(time.time() - entry["stored_at"], 1)
+            },
+            status="success"
+        )] + list(entry["result"].get("trace", []))
+        return result
+
+    def set(self, question: str, result: Dict[str, Any]):
+        if not self.enabled:
+            return
+        self._insert(question, result, time.time())
+
+    async def aset(self, question: str, result: Dict[str, Any]):
+        """set(), and publish the answer to the other worker processes"""
+        if not self.enabled:
+            return
+        entry = self._insert(question, result, time.time())
+        if shared_store.enabled:
+            shared = {
+                "question": question,
+                "stored_at": entry["stored_at"],
+                "result": dict(result, trace=[record.to_dict() for record in result.get("trace", [])]),
+            }
+            await shared_store.set("answer", entry["key"], shared, ttl=self.ttl)
+
+    def _insert(self, question: str, result: Dict[str, Any], stored_at: float) -> Dict[str, Any]:
+        key = normalize_query(question)
+        self._remove(key)
+        signature = self.hasher.signature(key)
+        entry = self._entries[key] = {
+            "key": key,
+            "question": question,
+            "signature": signature,
+            "anchors": anchors(question),
+            "result": result,
+            "stored_at": stored_at,
+        }
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.near_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "near_match": self.near_match,
+            "similarity_threshold": self.threshold,
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            # Shared hits are local misses answered from another worker
+            "hit_ratio": round((self.exact_hits + self.near_hits + self.shared_hits) / lookups, 3) if lookups else 0.0,
+        }
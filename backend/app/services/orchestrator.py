@@ -1,21 +1,34 @@
-from typing import Dict, Any
-import sys
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import asyncio
+import time
 import os
-from datetime import datetime
-
-# Add the current directory to Python path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-backend_dir = os.path.dirname(os.path.dirname(current_dir))
-sys.path.insert(0, backend_dir)
+from app.services.answer_cache import AnswerCache
+from app.services.admission import AdmissionController, OverloadedError
+from app.services.trace_store import TraceStore
+from app.tracing import TraceRecord
+from app.tools.cache import BatchMemo, batch_memo, normalize_query
+from app.metrics import REQUESTS_IN_FLIGHT
 
 try:
     from app.agents.research_agents import research_agents
+    from app.agents.context import ResearchContext
     AGENTS_AVAILABLE = True
     print("✅ Working research agents loaded successfully")
 except ImportError as e:
     print(f"❌ Research agents not available: {e}")
     AGENTS_AVAILABLE = False
 
+# Questions from one batch processed at the same time
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+# Time a started batch question gets past the batch deadline to hand back its partial answer
+BATCH_DEADLINE_GRACE_MS = float(os.getenv("BATCH_DEADLINE_GRACE_MS", 250))
+
+# End-to-end budget for a request unless the client sets one (0 disables)
+REQUEST_DEADLINE_MS = float(os.getenv("REQUEST_DEADLINE_MS", 25000))
+
+# Tool outcomes that mean an answer was built from placeholder data
+DEGRADED_STATUSES = {"demo", "fallback", "timeout"}
+
 class ResearchOrchestrator:
     """Main orchestrator for the research system"""
     
@@ -23,20 +36,183 @@ class ResearchOrchestrator:
         self.agents_available = AGENTS_AVAILABLE
         if self.agents_available:
             self.agents = research_agents
+        self.answer_cache = AnswerCache()
+        self.admission = AdmissionController()
+        self.trace_store = TraceStore()
         print(f"🚀 Orchestrator initialized - Agents: {'✅ Available' if self.agents_available else '❌ Fallback mode'}")
     
-    async def process_query(self, question: str) -> Dict[str, Any]:
-        """Process a user query using research agents or fallback"""
-        if self.agents_available:
-            return await self._process_with_agents(question)
+    async def process_query(self, question: str, priority: str = "normal",
+                            deadline_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Process a user query using research agents or fallback
+
+        Cache hits are answered immediately; everything else must be admitted
+        first and raises OverloadedError when the server is saturated. The
+        deadline budget starts now, so time spent queued counts against it.
+        """
+        return await self._answer(question, priority, self._deadline(deadline_ms))
+    
+    async def _answer(self, question: str, priority: str, deadline: Optional[float]) -> Dict[str, Any]:
+        cached = await self.answer_cache.aget(question)
+        if cached is not None:
+            return cached
+        
+        async with self.admission.slot(priority, timeout=self._queue_timeout(deadline)):
+            with REQUESTS_IN_FLIGHT.track():
+                if self.agents_available:
+                    result = await self._process_with_agents(question, deadline=deadline)
+                else:
+                    result = await self._process_fallback(question)
+        self.trace_store.record(question, result)
+        await self._remember(question, result)
+        return result
+    
+    def _deadline(self, deadline_ms: Optional[float]) -> Optional[float]:
+        """Absolute time.perf_counter() deadline for a budget in milliseconds"""
+        budget_ms = deadline_ms if deadline_ms is not None else REQUEST_DEADLINE_MS
+        if budget_ms <= 0:
+            return None
+        return time.perf_counter() + budget_ms / 1000
+
+    def _queue_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        """Never wait for admission longer than the request's budget"""
+        if deadline is None:
+            return None
+        return min(self.admission.queue_timeout, max(deadline - time.perf_counter(), 0.0))
+    
+    async def _remember(self, question: str, result: Dict[str, Any]):
+        """Cache complete answers only - never fallback, error or partial responses
+
+        Answers built from demo search results or demo page content (an open
+        circuit, an upstream timeout) are not cached either: the shared store
+        would serve the placeholders to every worker for the whole TTL.
+        """
+        trace = result.get("trace", [])
+        failed = any(
+            record.status in ("error", "timeout") or record.agent == "fallback_orchestrator"
+            or record.output.get("tool_type") == "mock"
+            or record.output.get("search_status") in DEGRADED_STATUSES
+            or record.output.get("fetch_status") in DEGRADED_STATUSES
+            for record in trace
+        )
+        if not failed and not result.get("partial") and result.get("citations"):
+            await self.answer_cache.aset(question, result)
+    
+    async def stream_query(self, question: str, priority: str = "normal",
+                           deadline_ms: Optional[float] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Process a query, yielding (event, data) pairs as work progresses
+
+        TraceRecords are yielded the moment an agent records them, followed
+        by each citation and finally the answer and reasoning. Admission
+        happens before the first event, so OverloadedError surfaces there.
+        """
+        deadline = self._deadline(deadline_ms)
+        cached = await self.answer_cache.aget(question)
+        if cached is not None:
+            result = cached
+            for entry in result["trace"]:
+                yield "trace", entry
+        elif not self.agents_available:
+            result = await self._process_fallback(question)
+            for entry in result["trace"]:
+                yield "trace", entry
         else:
-            return await self._process_fallback(question)
+            async with self.admission.slot(priority, timeout=self._queue_timeout(deadline)):
+                ctx = ResearchContext(question, deadline=deadline)
+                events = ctx.subscribe()
+                task = asyncio.create_task(self._process_tracked(question, ctx))
+                task.add_done_callback(lambda _: events.put_nowait(None))
+                try:
+                    while True:
+                        entry = await events.get()
+                        if entry is None:
+                            break
+                        yield "trace", entry
+                    result = task.result()
+                finally:
+                    # Client went away mid-stream: stop the pipeline
+                    if not task.done():
+                        task.cancel()
+
+            # Fallback results carry their own trace that was never streamed
+            for entry in result["trace"]:
+                if entry not in ctx.trace:
+                    yield "trace", entry
+            self.trace_store.record(question, result)
+            await self._remember(question, result)
+
+        for citation in result.get("citations", []):
+            yield "citation", citation
+        yield "answer", {"answer": result["answer"], "reasoning": result["reasoning"], "partial": result.get("partial", False)}
+        yield "done", {"citations": len(result.get("citations", [])), "trace_entries": len(result["trace"])}
+    
+    async def process_batch(self, questions: List[str], memo: BatchMemo, concurrency: Optional[int] = None,
+                            priority: str = "normal",
+                            deadline_ms: Optional[float] = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Process many questions concurrently, yielding (index, result) as each completes
+
+        Questions that normalize to the same text are answered once, and every
+        search query and page fetch is shared across the batch through memo.
+        At most `concurrency` distinct questions are in flight at a time, and
+        the deadline covers the whole batch: a question still waiting for its
+        turn when it passes is not started, and a running one is cancelled
+        BATCH_DEADLINE_GRACE_MS after it. A question shed by admission
+        control yields {"error": "overloaded", "retry_after": ...} instead of
+        an answer, and one that ran out of time {"error": "deadline_exceeded"}.
+        """
+        deadline = self._deadline(deadline_ms)
+        groups: Dict[str, List[int]] = {}
+        for index, question in enumerate(questions):
+            groups.setdefault(normalize_query(question), []).append(index)
+        pending = list(groups.values())
+        limit = max(1, concurrency or BATCH_CONCURRENCY)
+
+        async def answer(indexes: List[int]):
+            # Each task runs in its own context copy, so this never leaks to the caller
+            batch_memo.set(memo)
+            try:
+                question = questions[indexes[0]]
+                if deadline is None:
+                    return indexes, await self._answer(question, priority, deadline)
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                return indexes, await asyncio.wait_for(
+                    self._answer(question, priority, deadline), remaining + BATCH_DEADLINE_GRACE_MS / 1000
+                )
+            except OverloadedError as e:
+                # Shed, not answered: the client must be able to tell and retry
+                return indexes, {"error": "overloaded", "detail": str(e),
+                                 "status_code": e.status_code, "retry_after": e.retry_after}
+            except asyncio.TimeoutError:
+                return indexes, {"error": "deadline_exceeded", "detail": "Batch deadline exceeded"}
+            except Exception as e:
+                print(f"❌ Batch question failed: {e}")
+                return indexes, await self._process_fallback(questions[indexes[0]], error=str(e))
+
+        running = set()
+        try:
+            while pending or running:
+                while pending and len(running) < limit:
+                    running.add(asyncio.create_task(answer(pending.pop(0))))
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    indexes, result = task.result()
+                    for index in indexes:
+                        yield index, result
+        finally:
+            for task in running:
+                task.cancel()
     
-    async def _process_with_agents(self, question: str) -> Dict[str, Any]:
+    async def _process_tracked(self, question: str, ctx: "ResearchContext") -> Dict[str, Any]:
+        with REQUESTS_IN_FLIGHT.track():
+            return await self._process_with_agents(question, context=ctx)
+    
+    async def _process_with_agents(self, question: str, context: "ResearchContext" = None,
+                                   deadline: Optional[float] = None) -> Dict[str, Any]:
         """Process using research agents"""
         try:
             print(f"🤖 Processing with Working Agents: {question}")
-            result = await self.agents.process_question(question)
+            result = await self.agents.process_question(question, context=context, deadline=deadline)
             print(f"✅ Agent processing completed")
             return result
         except Exception as e:
@@ -58,15 +234,14 @@ class ResearchOrchestrator:
                 }
             ],
             "trace": [
-                {
-                    "timestamp": datetime.now().isoformat(),
-                    "agent": "fallback_orchestrator",
-                    "action": "process_query",
-                    "tool": "fallback_processor",
-                    "input": {"question": question},
-                    "output": {"status": "fallback_mode", "agents_available": self.agents_available},
-                    "status": "success"
-                }
+                TraceRecord(
+                    agent="fallback_orchestrator",
+                    action="process_query",
+                    tool="fallback_processor",
+                    input={"question": question},
+                    output={"status": "fallback_mode", "agents_available": self.agents_available},
+                    status="success"
+                )
             ]
         }
 
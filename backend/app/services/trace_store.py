@@ -0,0 +1,181 @@
+import os
+import json
+import random
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.tracing import TraceRecord
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, and no multi-worker deployment to guard
+    fcntl = None
+
+
+class TraceStore:
+    """Append-only JSONL log of full request traces for later analysis
+
+    Disabled unless TRACE_STORE_PATH is set. Recording a request only queues
+    a reference to its trace; a background task serializes and appends the
+    queue in a worker thread every flush_interval seconds, so neither JSON
+    encoding nor disk I/O happens on the request path. Requests are sampled
+    at sample_rate, but partial and failed ones are always kept. The file
+    is rotated to <path>.1 once it grows past max_bytes.
+
+    Worker processes of a multi-worker server share the file, so the size
+    check, rotation and append happen under an exclusive flock on
+    <path>.lock, and queries read under a shared one; otherwise two workers
+    could both rotate, or append to a file that was just rotated away.
+    """
+
+    def __init__(self, path: str = None, sample_rate: float = None, max_bytes: int = None,
+                 flush_interval: float = None, max_pending: int = 10000):
+        self.path = path if path is not None else os.getenv("TRACE_STORE_PATH", "")
+        self.enabled = bool(self.path)
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("TRACE_STORE_SAMPLE_RATE", 1.0))
+        self.max_bytes = max_bytes or int(os.getenv("TRACE_STORE_MAX_BYTES", 50_000_000))
+        self.flush_interval = flush_interval or float(os.getenv("TRACE_STORE_FLUSH_INTERVAL", 1.0))
+
+        self._pending: deque = deque(maxlen=max_pending)
+        self._writer: Optional[asyncio.Task] = None
+        # Serializes appends from the background writer and from queries
+        self._write_lock = asyncio.Lock()
+
+        self.recorded = 0
+        self.sampled_out = 0
+        self.written = 0
+        self.rotations = 0
+        self.write_errors = 0
+
+    def record(self, question: str, result: Dict[str, Any]):
+        """Queue a finished request's trace for the store"""
+        if not self.enabled:
+            return
+        trace: List[TraceRecord] = result.get("trace", [])
+        failed = any(record.status == "error" for record in trace)
+        if not (failed or result.get("partial")) and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+        meta = {
+            "request_id": result.get("request_id"),
+            "question": question,
+            "recorded_at": datetime.now().isoformat(),
+            "partial": bool(result.get("partial")),
+            "citations": len(result.get("citations", [])),
+        }
+        self._pending.append((meta, trace))
+        self.recorded += 1
+
+    async def start(self):
+        if self.enabled and self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+            print(f"🗂️ Trace store writing to {self.path}")
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        async with self._write_lock:
+            batch = list(self._pending)
+            self._pending.clear()
+            if batch:
+                await asyncio.to_thread(self._write, batch)
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        """Cross-process lock guarding the log and its rotation"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write(self, batch: List[Tuple[Dict[str, Any], List[TraceRecord]]]):
+        lines = [
+            json.dumps(dict(meta, trace=[record.to_dict() for record in trace]), default=str)
+            for meta, trace in batch
+        ]
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._file_lock():
+                if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                    self.rotations += 1
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            self.written += len(lines)
+        except OSError as e:
+            self.write_errors += 1
+            print(f"Trace store write failed: {e}")
+
+    async def query(self, request_id: str = None, question: str = None, agent: str = None,
+                    status: str = None, partial: bool = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent stored traces matching every given filter, newest first"""
+        await self.flush()
+        return await asyncio.to_thread(self._scan, request_id, question, agent, status, partial, limit)
+
+    def _scan(self, request_id, question, agent, status, partial, limit) -> List[Dict[str, Any]]:
+        if not os.path.exists(os.path.dirname(self.path) or "."):
+            return []
+        with self._file_lock(shared=True):
+            return self._scan_files(request_id, question, agent, status, partial, limit)
+
+    def _scan_files(self, request_id, question, agent, status, partial, limit) -> List[Dict[str, Any]]:
+        needle = question.casefold() if question else None
+        matches: deque = deque(maxlen=limit)
+        for path in (f"{self.path}.1", self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    # Cheap substring checks before paying for json.loads
+                    if request_id and request_id not in line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if request_id and entry.get("request_id") != request_id:
+                        continue
+                    if needle and needle not in entry.get("question", "").casefold():
+                        continue
+                    if partial is not None and entry.get("partial") != partial:
+                        continue
+                    if agent and not any(step.get("agent") == agent for step in entry["trace"]):
+                        continue
+                    if status and not any(step.get("status") == status for step in entry["trace"]):
+                        continue
+                    matches.append(entry)
+        return list(reversed(matches))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "sample_rate": self.sample_rate,
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "sampled_out": self.sampled_out,
+            "written": self.written,
+            "rotations": self.rotations,
+            "write_errors": self.write_errors,
+        }
@@ -0,0 +1,75 @@
+import os
+import time
+import asyncio
+import importlib
+from typing import Dict, Any, List, Optional
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class StartupReport:
+    """Cold-start timings and the optional warm-up run before the server is ready
+
+    Uvicorn only accepts connections once the lifespan startup has finished,
+    so running warm_up() there means the first request already finds open
+    upstream connections and loaded modules. Timings are reported in /health.
+    """
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.enabled = _env_flag("WARMUP_ENABLED")
+        self.timeout = float(os.getenv("WARMUP_TIMEOUT", 3.0))
+        self.extra_urls = [url.strip() for url in os.getenv("WARMUP_URLS", "").split(",") if url.strip()]
+
+        self.import_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        self.ready_ms: Optional[float] = None
+        self.warmed: Dict[str, bool] = {}
+        self.preloaded: List[str] = []
+
+    def _since_start(self) -> float:
+        return round((time.perf_counter() - self.started_at) * 1000, 2)
+
+    def imported(self):
+        self.import_ms = self._since_start()
+
+    async def warm_up(self, http_client, urls: List[str], modules: List[str]):
+        """Pre-connect to upstream hosts and import lazily loaded modules in parallel"""
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        urls = list(dict.fromkeys(urls + self.extra_urls))
+
+        async def preload(name: str):
+            try:
+                await asyncio.to_thread(importlib.import_module, name)
+                self.preloaded.append(name)
+            except ImportError as e:
+                print(f"⚠️ Warm-up could not import {name}: {e}")
+
+        try:
+            results = await asyncio.wait_for(asyncio.gather(
+                http_client.warm_up(urls, timeout=self.timeout),
+                *[preload(name) for name in modules]
+            ), timeout=self.timeout + 1)
+            self.warmed = results[0]
+        except asyncio.TimeoutError:
+            print("⚠️ Warm-up timed out, starting anyway")
+        self.warmup_ms = round((time.perf_counter() - started) * 1000, 2)
+        print(f"🔥 Warm-up finished in {self.warmup_ms}ms "
+              f"({sum(self.warmed.values())}/{len(urls)} hosts, modules: {', '.join(self.preloaded) or 'none'})")
+
+    def ready(self):
+        self.ready_ms = self._since_start()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "import_ms": self.import_ms,
+            "warmup_enabled": self.enabled,
+            "warmup_ms": self.warmup_ms,
+            "ready_ms": self.ready_ms,
+            "warmed_hosts": self.warmed,
+            "preloaded_modules": self.preloaded,
+        }
@@ -0,0 +1,399 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import unicodedata
+from contextvars import ContextVar
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from email.utils import parsedate_to_datetime
+
+from .dedup import canonicalize_url
+from .shared_store import shared_store
+
+
+# Sentence punctuation that may end a question without changing it
+_TRAILING_PUNCTUATION = ".?!,;:…\"'”’)"
+
+
+def normalize_query(query: str) -> str:
+    """Fold case and whitespace and drop trailing sentence punctuation
+
+    This is an exact-match key (search cache, answer cache, batch grouping),
+    so symbols inside tokens are kept: "C++", "C#" and "C" are different
+    questions.
+    """
+    text = " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+    return text.rstrip(_TRAILING_PUNCTUATION + " ")
+
+
+class LRUCache:
+    """Bounded in-memory mapping that evicts the least recently used key"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 300.0):
+        self.memory = LRUCache(max_entries)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.memory.get(key)
+        if entry is None or entry["expires_at"] <= time.time():
+            if entry is not None:
+                self.memory.pop(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["value"]
+
+    def set(self, key: str, value: Any):
+        self.memory.set(key, {"value": value, "expires_at": time.time() + self.ttl})
+
+    def clear(self):
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.memory),
+            "max_entries": self.memory.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight task
+
+    Callers that arrive while a call is running await the same task instead
+    of starting their own. The task is shielded so a cancelled caller does
+    not cancel the work other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn):
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
+
+
+class BatchMemo:
+    """Results shared by every question answered in one batch
+
+    Unlike the TTL caches this also keeps uncacheable pages and fallback
+    results, so within a batch each search query and URL is worked on once.
+    """
+
+    def __init__(self):
+        self._results: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def do(self, key: str, fn):
+        task = self._results.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(fn())
+            self._results[key] = task
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"shared_calls": self.misses, "deduplicated_calls": self.hits}
+
+# Set for the duration of a batch; tasks created inside it inherit the memo
+batch_memo: ContextVar[Optional[BatchMemo]] = ContextVar("batch_memo", default=None)
+
+
+class FetchCache:
+    """Two-tier cache of cleaned page text for WebFetchTool
+
+    Entries live in a bounded memory LRU and, when a directory is configured,
+    in JSON files on disk; with the shared store enabled they are also
+    visible to the other worker processes. Freshness follows the origin's
+    Cache-Control max-age; stale entries keep their ETag/Last-Modified so
+    the tool can revalidate them with a conditional request instead of
+    re-downloading.
+
+    The disk tier is bounded by disk_max_entries files and disk_max_bytes;
+    past either limit the least recently used files (by modification time,
+    which reads refresh) are deleted.
+    """
+
+    def __init__(self, max_entries: int = None, default_ttl: float = None, disk_dir: str = None,
+                 disk_max_entries: int = None, disk_max_bytes: int = None):
+        self.memory = LRUCache(max_entries or int(os.getenv("FETCH_CACHE_MAX_ENTRIES", 256)))
+        self.default_ttl = default_ttl if default_ttl is not None else float(os.getenv("FETCH_CACHE_DEFAULT_TTL", 300))
+        self.disk_dir = disk_dir or os.getenv("FETCH_CACHE_DIR") or None
+        self.disk_max_entries = disk_max_entries or int(os.getenv("FETCH_CACHE_DISK_MAX_ENTRIES", 10000))
+        self.disk_max_bytes = disk_max_bytes or int(os.getenv("FETCH_CACHE_DISK_MAX_BYTES", 200_000_000))
+        self._disk_entries = 0
+        self._disk_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        self.stores = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._prune_disk()
+
+    def key(self, url: str, max_chars: int) -> str:
+        return f"{canonicalize_url(url)}|{max_chars}"
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # Recently read files are the last to be evicted
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            replaced = os.path.getsize(path) if os.path.exists(path) else None
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Fetch cache disk write failed: {e}")
+            return
+        if replaced is None:
+            self._disk_entries += 1
+        self._disk_bytes += size - (replaced or 0)
+        if self._disk_entries > self.disk_max_entries or self._disk_bytes > self.disk_max_bytes:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Recount the disk tier and delete the least recently used files beyond its limits
+
+        The totals are re-read from the directory, so files written by other
+        worker processes are accounted for too.
+        """
+        files = []
+        try:
+            with os.scandir(self.disk_dir) as entries:
+                for item in entries:
+                    if item.name.endswith(".json"):
+                        try:
+                            stat = item.stat()
+                        except OSError:
+                            continue
+                        files.append((stat.st_mtime, stat.st_size, item.path))
+        except OSError as e:
+            print(f"Fetch cache disk scan failed: {e}")
+            return
+        files.sort()
+        count, total = len(files), sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if count <= self.disk_max_entries and total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            count -= 1
+            total -= size
+            self.disk_evictions += 1
+        self._disk_entries, self._disk_bytes = count, total
+
+    def _lookup_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self.disk_hits += 1
+                self.memory.set(key, entry)
+        return entry
+
+    def _count(self, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            self.misses += 1
+        elif self.is_fresh(entry):
+            self.hits += 1
+        else:
+            self.stale += 1
+        return entry
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry from memory or disk (fresh or stale), or None on a miss"""
+        return self._count(self._lookup_local(key))
+
+    async def alookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """lookup(), then the entries other worker processes stored; a miss is counted once"""
+        entry = self._lookup_local(key)
+        if entry is None:
+            entry = await shared_store.get("fetch", key)
+            if entry is not None:
+                self.shared_hits += 1
+                self.memory.set(key, entry)
+        return self._count(entry)
+
+    async def share(self, key: str):
+        """Publish the local entry for key to the other worker processes"""
+        entry = self.memory.get(key)
+        if entry is not None:
+            await shared_store.set("fetch", key, entry)
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return entry.get("expires_at", 0) > time.time()
+
+    def conditional_headers(self, entry: Dict[str, Any]) -> Dict[str, str]:
+        """Validators to send when revalidating a stale entry"""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _ttl(self, headers) -> Optional[float]:
+        """Freshness lifetime from response headers, None when the response must not be stored"""
+        cache_control = (headers.get("cache-control") or "").lower()
+        directives = {}
+        for part in cache_control.split(","):
+            name, _, value = part.strip().partition("=")
+            if name:
+                directives[name] = value.strip('"')
+
+        if "no-store" in directives or "private" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0.0
+        for name in ("s-maxage", "max-age"):
+            if name in directives:
+                try:
+                    return max(float(directives[name]), 0.0)
+                except ValueError:
+                    break
+        if headers.get("expires"):
+            try:
+                return max(parsedate_to_datetime(headers["expires"]).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return 0.0
+        return self.default_ttl
+
+    def store(self, key: str, result: Dict[str, Any], headers) -> Optional[Dict[str, Any]]:
+        """Cache a fresh download; returns the entry, or None when headers forbid storing it"""
+        ttl = self._ttl(headers)
+        if ttl is None:
+            return None
+        entry = {
+            "result": result,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "stored_at": time.time(),
+            "expires_at": time.time() + ttl,
+        }
+        self.memory.set(key, entry)
+        self._write_disk(key, entry)
+        self.stores += 1
+        return entry
+
+    def refresh(self, key: str, entry: Dict[str, Any], headers) -> Dict[str, Any]:
+        """Extend a stale entry after the origin answered 304 Not Modified"""
+        self.not_modified += 1
+        ttl = self._ttl(headers)
+        entry = dict(entry)
+        entry["expires_at"] = time.time() + (ttl if ttl is not None else 0.0)
+        entry["etag"] = headers.get("etag") or entry.get("etag")
+        entry["last_modified"] = headers.get("last-modified") or entry.get("last_modified")
+        self.memory.set(key, entry)
+        self._write_disk(key, entry)
+        return entry
+
+    def clear(self):
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale + self.misses
+        return {
+            "entries": len(self.memory),
+            "max_entries": self.memory.max_entries,
+            "disk_enabled": bool(self.disk_dir),
+            "disk_entries": self._disk_entries,
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "revalidations": self.revalidations,
+            "not_modified": self.not_modified,
+            "stores": self.stores,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
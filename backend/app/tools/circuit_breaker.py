@@ -0,0 +1,171 @@
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+from app.metrics import metrics
+
+CIRCUIT_OPEN = metrics.gauge("upstream_circuit_open", "1 while the circuit breaker for a host is open or half-open")
+CIRCUIT_REJECTED = metrics.counter("upstream_circuit_rejected_total", "Outbound requests failed fast by an open circuit")
+
+
+def _env_flag(name: str, default: str = "true") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit open for {host}, retrying in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class HostBreaker:
+    """Circuit breaker and latency tracker for one upstream host
+
+    closed: requests flow and outcomes fill a sliding window; once it holds
+    min_requests outcomes and the failure rate reaches failure_rate the
+    breaker opens. open: requests fail fast until open_seconds pass.
+    half_open: up to half_open_probes requests are let through; a success
+    closes the breaker, a failure opens it again.
+
+    Successful latencies also drive an adaptive timeout: a multiple of the
+    host's recent high percentile, never above the caller's own timeout.
+    """
+
+    def __init__(self, host: str, window: int, min_requests: int, failure_rate: float, open_seconds: float,
+                 half_open_probes: int, latency_samples: int, percentile: float, multiplier: float,
+                 min_timeout: float, adaptive: bool):
+        self.host = host
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.adaptive = adaptive
+
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self._outcomes = deque(maxlen=window)
+        self._latencies = deque(maxlen=latency_samples)
+
+        self.trips = 0
+        self.rejected = 0
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        CIRCUIT_OPEN.set(1, host=self.host)
+        print(f"⚡ Circuit opened for {self.host}")
+
+    def _close(self):
+        self.state = "closed"
+        self._outcomes.clear()
+        CIRCUIT_OPEN.set(0, host=self.host)
+        print(f"⚡ Circuit closed for {self.host}")
+
+    def before_request(self):
+        """Let the request through or raise CircuitOpenError"""
+        if self.state == "open":
+            retry_in = self.opened_at + self.open_seconds - time.monotonic()
+            if retry_in > 0:
+                self.rejected += 1
+                CIRCUIT_REJECTED.inc(host=self.host)
+                raise CircuitOpenError(self.host, retry_in)
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self.probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                CIRCUIT_REJECTED.inc(host=self.host)
+                raise CircuitOpenError(self.host, 0.0)
+            self.probes_in_flight += 1
+
+    def after_request(self, ok: Optional[bool], latency: float):
+        """Record an outcome; None means the caller gave up and says nothing about the host"""
+        if self.state == "half_open":
+            self.probes_in_flight = max(self.probes_in_flight - 1, 0)
+            if ok:
+                self._close()
+            elif ok is False:
+                self._open()
+        elif self.state == "closed" and ok is not None:
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+        if ok:
+            self._latencies.append(latency)
+
+    def latency_percentile(self) -> Optional[float]:
+        if len(self._latencies) < self._latencies.maxlen // 2:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)]
+
+    def timeout(self, requested: float) -> float:
+        """Adaptive timeout for the next request, capped by the requested one"""
+        observed = self.latency_percentile() if self.adaptive else None
+        if observed is None:
+            return requested
+        return min(requested, max(observed * self.multiplier, self.min_timeout))
+
+    def stats(self) -> Dict[str, Any]:
+        observed = self.latency_percentile()
+        return {
+            "state": self.state,
+            "failure_rate": round(self._outcomes.count(False) / len(self._outcomes), 3) if self._outcomes else 0.0,
+            "window": len(self._outcomes),
+            "trips": self.trips,
+            "rejected": self.rejected,
+            f"latency_p{self.percentile:g}_ms": round(observed * 1000, 2) if observed is not None else None,
+        }
+
+
+class CircuitBreakerRegistry:
+    """One HostBreaker per upstream host, configured from the environment"""
+
+    def __init__(self):
+        self.enabled = _env_flag("CIRCUIT_BREAKER_ENABLED")
+        self.config = {
+            "window": int(os.getenv("CIRCUIT_WINDOW", 20)),
+            "min_requests": int(os.getenv("CIRCUIT_MIN_REQUESTS", 5)),
+            "failure_rate": float(os.getenv("CIRCUIT_FAILURE_RATE", 0.5)),
+            "open_seconds": float(os.getenv("CIRCUIT_OPEN_SECONDS", 30)),
+            "half_open_probes": int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", 1)),
+            "latency_samples": int(os.getenv("ADAPTIVE_TIMEOUT_SAMPLES", 50)),
+            "percentile": float(os.getenv("ADAPTIVE_TIMEOUT_PERCENTILE", 99)),
+            "multiplier": float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", 3)),
+            "min_timeout": float(os.getenv("ADAPTIVE_TIMEOUT_MIN", 1.0)),
+            "adaptive": _env_flag("ADAPTIVE_TIMEOUT_ENABLED"),
+        }
+        self._breakers: Dict[str, HostBreaker] = {}
+
+    def get(self, host: str) -> HostBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = HostBreaker(host, **self.config)
+            if not self.enabled:
+                # Never trips, but still tracks latency for adaptive timeouts
+                breaker.min_requests = float("inf")
+            self._breakers[host] = breaker
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {host: breaker.stats() for host, breaker in self._breakers.items()}
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate numbers for /metrics"""
+        states = [breaker.state for breaker in self._breakers.values()]
+        return {
+            "hosts": len(states),
+            "open": states.count("open"),
+            "half_open": states.count("half_open"),
+            "trips": sum(breaker.trips for breaker in self._breakers.values()),
+            "rejected": sum(breaker.rejected for breaker in self._breakers.values()),
+        }
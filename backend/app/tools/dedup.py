@@ -0,0 +1,229 @@
+import os
+import re
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Query parameters that only identify the click, never the content. Generic
+# names such as ref or source are left alone: some sites select content by them
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref_src", "ref_url", "spm", "_ga", "_gl", "_hsenc", "_hsmi",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+# Redirect wrappers whose target URL is carried in a query parameter: host -> (path, parameter)
+REDIRECT_WRAPPERS = {
+    "duckduckgo.com": ("/l/", "uddg"),
+    "google.com": ("/url", "q"),
+    "l.facebook.com": ("/l.php", "u"),
+}
+
+# Labels that mark a mobile mirror of a site (m.example.com, en.m.wikipedia.org)
+MOBILE_LABELS = frozenset({"m", "mobile"})
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+_WORD_RE = re.compile(r"\w+")
+# _BIT_TABLES[bit] maps every byte value to 1 if that bit is set, else 0
+_BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+
+def _unwrap_redirect(parsed) -> Optional[str]:
+    host = parsed.hostname or ""
+    if host.startswith("www."):
+        host = host[4:]
+    wrapper = REDIRECT_WRAPPERS.get(host)
+    if wrapper and parsed.path.startswith(wrapper[0]):
+        for name, value in parse_qsl(parsed.query):
+            if name == wrapper[1] and value.startswith(("http://", "https://")):
+                return value
+    return None
+
+
+def canonicalize_url(url: str) -> str:
+    """Key form of a URL, shared by its mirrors; the cache and dedup key, never fetched
+
+    Unwraps known redirect links, lower-cases scheme and host, drops default
+    ports, credentials, fragments, tracking parameters and mobile subdomains,
+    sorts the remaining query parameters and trims trailing slashes. The
+    result may not be served by the site (a trailing slash removed can turn
+    into a redirect, an m. host can serve other markup), so callers keep
+    fetching the URL they were given. Anything that is not an http(s) URL is
+    returned unchanged.
+    """
+    url = (url or "").strip()
+    parsed = urlparse(url)
+    if parsed.scheme.lower() not in DEFAULT_PORTS or not parsed.hostname:
+        return url
+    # Redirect wrappers may nest (a DuckDuckGo link to a Google redirect)
+    for _ in range(3):
+        target = _unwrap_redirect(parsed)
+        if target is None:
+            break
+        parsed = urlparse(target)
+
+    scheme = parsed.scheme.lower()
+    labels = (parsed.hostname or "").rstrip(".").split(".")
+    if len(labels) > 2:
+        labels = [label for label in labels[:-2] if label not in MOBILE_LABELS] + labels[-2:]
+    host = ".".join(labels)
+    if parsed.port and str(parsed.port) != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parsed.port}"
+
+    path = re.sub(r"/{2,}", "/", parsed.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    ))
+    return urlunparse((scheme, host, path, parsed.params, query, ""))
+
+
+def url_key(url: str) -> str:
+    """Identity of a canonical URL for duplicate detection (ignores scheme and www.)"""
+    parsed = urlparse(canonicalize_url(url))
+    host = parsed.netloc[4:] if parsed.netloc.startswith("www.") else parsed.netloc
+    return urlunparse(("", host, parsed.path, parsed.params, parsed.query, ""))
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """64-bit SimHash of a text over word shingles
+
+    Each shingle is hashed once with blake2b and the digests are packed into
+    one bytes object. Bit weights are then counted per byte column with
+    bytes.translate/count, so the per-bit voting runs in C instead of a
+    Python loop over every shingle and every bit.
+    """
+    words = _WORD_RE.findall(text.casefold())
+    if not words:
+        return 0
+    shingles = zip(*(words[i:] for i in range(min(shingle, len(words)))))
+    packed = b"".join([
+        hashlib.blake2b(" ".join(piece).encode("utf-8"), digest_size=8).digest() for piece in shingles
+    ])
+    total = len(packed) // 8
+    fingerprint = 0
+    for position in range(8):
+        column = packed[position::8]
+        for bit, table in enumerate(_BIT_TABLES):
+            if column.translate(table).count(1) * 2 > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ContentDeduplicator:
+    """Remembers SimHash fingerprints of fetched pages to spot mirrors and near-copies
+
+    Fingerprints are split into four 16-bit bands; two fingerprints within
+    max_distance <= 3 bits must agree on at least one band, so a lookup only
+    compares against documents sharing a band instead of every document.
+    A URL found to duplicate another is remembered as an alias, and later
+    fetches of it are served from the original. Both maps are LRU-bounded.
+    Re-checking a page whose text is unchanged (a fetch cache hit) skips
+    fingerprinting; str hashes are cached, so that comparison is O(1).
+    """
+
+    BANDS = 4
+
+    def __init__(self, max_documents: int = None, max_distance: int = None, min_chars: int = None):
+        self.max_documents = max_documents or int(os.getenv("DEDUP_MAX_DOCUMENTS", 5000))
+        self.max_distance = max_distance if max_distance is not None else int(os.getenv("DEDUP_MAX_DISTANCE", 3))
+        # Short pages (error stubs, demo content) fingerprint too coarsely to compare
+        self.min_chars = min_chars if min_chars is not None else int(os.getenv("DEDUP_MIN_CHARS", 200))
+        self.enabled = os.getenv("CONTENT_DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+        # url -> (fingerprint, hash of the fingerprinted text)
+        self._documents: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        self._bands: List[Dict[int, List[str]]] = [{} for _ in range(self.BANDS)]
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+
+        self.checked = 0
+        self.duplicates = 0
+        self.alias_hits = 0
+
+    def _band_values(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> (16 * band)) & 0xFFFF for band in range(self.BANDS)]
+
+    def _find(self, fingerprint: int) -> Optional[str]:
+        seen = set()
+        for band, value in enumerate(self._band_values(fingerprint)):
+            for url in self._bands[band].get(value, ()):
+                if url not in seen:
+                    seen.add(url)
+                    if hamming(self._documents[url][0], fingerprint) <= self.max_distance:
+                        return url
+        return None
+
+    def _add(self, url: str, fingerprint: int, text_hash: int):
+        self._documents[url] = (fingerprint, text_hash)
+        for band, value in enumerate(self._band_values(fingerprint)):
+            self._bands[band].setdefault(value, []).append(url)
+        while len(self._documents) > self.max_documents:
+            self._remove(next(iter(self._documents)))
+
+    def _remove(self, url: str):
+        fingerprint, _ = self._documents.pop(url)
+        for band, value in enumerate(self._band_values(fingerprint)):
+            urls = self._bands[band].get(value, [])
+            if url in urls:
+                urls.remove(url)
+            if not urls:
+                self._bands[band].pop(value, None)
+
+    def original_of(self, url: str) -> Optional[str]:
+        """The page a URL is known to duplicate, if any"""
+        original = self._aliases.get(url)
+        if original is not None:
+            if original in self._documents:
+                self._aliases.move_to_end(url)
+                self.alias_hits += 1
+                return original
+            # The original was evicted, so fetch this URL on its own again
+            del self._aliases[url]
+        return None
+
+    def check(self, url: str, text: str) -> Optional[str]:
+        """Register a fetched page; returns the URL of an earlier near-duplicate, else None"""
+        if not self.enabled or len(text) < self.min_chars:
+            return None
+        self.checked += 1
+        text_hash = hash(text)
+        known = self._documents.get(url)
+        if known is not None and known[1] == text_hash:
+            self._documents.move_to_end(url)
+            return None
+        fingerprint = simhash(text)
+        if known is not None:
+            # Re-fetched with new text: drop the old fingerprint and compare afresh
+            self._remove(url)
+
+        original = self._find(fingerprint)
+        if original is None:
+            self._add(url, fingerprint, text_hash)
+            return None
+        self.duplicates += 1
+        self._documents.move_to_end(original)
+        self._aliases[url] = original
+        while len(self._aliases) > self.max_documents:
+            self._aliases.popitem(last=False)
+        return original
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "documents": len(self._documents),
+            "aliases": len(self._aliases),
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "alias_hits": self.alias_hits,
+        }
+
+# Initialize the shared deduplicator
+content_dedup = ContentDeduplicator()
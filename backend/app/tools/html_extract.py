@@ -0,0 +1,152 @@
+import os
+import asyncio
+import importlib.util
+from html.parser import HTMLParser
+from concurrent.futures import Executor
+from typing import Dict, Any, Optional
+
+# BeautifulSoup and lxml are not imported with this module but on the first
+# bulk parse, which the default (non-streaming) fetch path does for every page
+# whatever HTML_PARSER is set to. Only FETCH_STREAMING=true, which parses with
+# the standard library's HTMLParser, never loads them.
+LXML_AVAILABLE = importlib.util.find_spec("lxml") is not None
+
+
+def resolve_parser(parser: str = None) -> str:
+    """Pick the BeautifulSoup parser backend ('auto' prefers lxml when installed)"""
+    parser = (parser or os.getenv("HTML_PARSER", "auto")).lower()
+    if parser == "auto":
+        return "lxml" if LXML_AVAILABLE else "html.parser"
+    if parser == "lxml" and not LXML_AVAILABLE:
+        print("⚠️ lxml parser requested but not installed, using html.parser")
+        return "html.parser"
+    return parser
+
+
+def clean_text(text: str) -> str:
+    """Collapse page text into single-spaced phrases"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def extract_text(html: str, max_chars: int, parser: str = "html.parser") -> Dict[str, Any]:
+    """Parse HTML and return its title and cleaned, length-limited text
+
+    This is CPU-bound and runs in a worker thread or process, so it must stay
+    a plain module-level function with picklable arguments and result.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, parser)
+
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+
+    text = clean_text(soup.get_text())
+
+    # Limit content length
+    if len(text) > max_chars:
+        text = text[:max_chars] + "..."
+
+    return {
+        "title": str(soup.title.string) if soup.title and soup.title.string else "No Title",
+        "content": text,
+    }
+
+
+class IncrementalTextExtractor(HTMLParser):
+    """Streaming text extractor fed one decoded chunk at a time
+
+    Used by the streaming fetch mode: it skips script/style content, keeps
+    the first <title>, and reports done once max_chars of visible text have
+    been collected so the caller can stop downloading.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title = None
+        self._title_parts = None
+        self._skip_depth = 0
+        self._parts = []
+        self._collected = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title" and self.title is None:
+            self._title_parts = []
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == "title" and self._title_parts is not None:
+            self.title = "".join(self._title_parts).strip() or None
+            self._title_parts = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        self._parts.append(data)
+        self._collected += len(" ".join(data.split()))
+
+    @property
+    def done(self) -> bool:
+        return self._collected > self.max_chars
+
+    def result(self) -> Dict[str, Any]:
+        text = clean_text("".join(self._parts))
+        if len(text) > self.max_chars:
+            text = text[:self.max_chars] + "..."
+        return {"title": self.title or "No Title", "content": text}
+
+
+class HTMLExtractor:
+    """Runs extract_text off the event loop
+
+    mode is 'thread' (default), 'process' or 'inline'. A process pool avoids
+    the GIL entirely at the cost of pickling the page; 'inline' keeps the old
+    behaviour of parsing on the event loop.
+    """
+
+    def __init__(self, mode: str = None, workers: int = None, parser: str = None):
+        self.mode = (mode or os.getenv("HTML_PARSE_EXECUTOR", "thread")).lower()
+        self.workers = workers or int(os.getenv("HTML_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+        self.parser = resolve_parser(parser)
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        if self.mode == "inline":
+            return None
+        if self._executor is None:
+            if self.mode == "process":
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="html-extract")
+        return self._executor
+
+    async def extract(self, html: str, max_chars: int) -> Dict[str, Any]:
+        if self.mode == "inline":
+            return extract_text(html, max_chars, self.parser)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, extract_text, html, max_chars, self.parser)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "workers": self.workers, "parser": self.parser}
+
+# Initialize the shared extractor
+html_extractor = HTMLExtractor()
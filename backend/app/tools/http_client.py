@@ -0,0 +1,256 @@
+import httpx
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+from app.metrics import UPSTREAM_DURATION, UPSTREAM_ERRORS
+from .circuit_breaker import CircuitBreakerRegistry
+
+try:
+    import h2  # noqa: F401 - only needed when HTTP/2 is enabled
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+class SharedHTTPClient:
+    """Pooled httpx client shared by all MCP tools
+
+    One AsyncClient is kept for the whole process so DNS lookups, TCP/TLS
+    handshakes and keep-alive connections are reused across questions.
+    The FastAPI lifespan hook in main.py owns start()/close(); scripts that
+    never start it get a client created lazily on first use.
+
+    Every request also goes through the host's circuit breaker: hosts that
+    keep failing are refused immediately with CircuitOpenError, and timeouts
+    shrink to what the host's recent latency justifies.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        max_connections_per_host: int = None,
+        keepalive_expiry: float = None,
+        http2: bool = None,
+        connect_timeout: float = None,
+        default_timeout: float = None,
+    ):
+        self.max_connections = max_connections or _env_int("HTTP_MAX_CONNECTIONS", 100)
+        self.max_keepalive_connections = max_keepalive_connections or _env_int("HTTP_MAX_KEEPALIVE", 20)
+        self.max_connections_per_host = max_connections_per_host or _env_int("HTTP_MAX_PER_HOST", 10)
+        self.keepalive_expiry = keepalive_expiry or _env_float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+        self.connect_timeout = connect_timeout or _env_float("HTTP_CONNECT_TIMEOUT", 5.0)
+        self.default_timeout = default_timeout or _env_float("REQUEST_TIMEOUT", 30.0)
+
+        if http2 is None:
+            http2 = os.getenv("HTTP_HTTP2", "false").lower() in ("1", "true", "yes")
+        if http2 and not HTTP2_AVAILABLE:
+            print("⚠️ HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.breakers = CircuitBreakerRegistry()
+
+        # Pool metrics
+        self.requests_total = 0
+        self.new_connections = 0
+        self.errors_total = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.warmed_connections = 0
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        timeout = httpx.Timeout(self.default_timeout, connect=self.connect_timeout)
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=self.http2)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self):
+        """Open the shared client (called from the app lifespan)"""
+        _ = self.client
+        print(f"🌐 Shared HTTP client started (http2={self.http2}, per_host={self.max_connections_per_host})")
+
+    async def close(self):
+        """Close the shared client and drop all pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._host_limits = {}
+        print("🌐 Shared HTTP client closed")
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(str(url)).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_limits[host] = limit
+        return limit
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]):
+        # httpcore emits this once for every freshly opened TCP connection
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+
+    async def _acquire(self, url: str) -> asyncio.Semaphore:
+        limit = self._host_limit(url)
+        wait_started = time.perf_counter()
+        await limit.acquire()
+        waited = time.perf_counter() - wait_started
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+        self.requests_total += 1
+        return limit
+
+    @staticmethod
+    def _healthy(response: httpx.Response) -> bool:
+        # Client errors say nothing about the host; overload and server errors do
+        return response.status_code < 500 and response.status_code != 429
+
+    def _timeout(self, breaker, requested: Optional[float], budget: Optional[float]):
+        """Timeout for one request and whether the caller's budget, not the host's timeout, set it"""
+        host_timeout = breaker.timeout(requested or self.default_timeout)
+        if budget is not None and budget < host_timeout:
+            return budget, True
+        return host_timeout, False
+
+    @staticmethod
+    def _outcome(error: Exception, budget_capped: bool) -> Optional[bool]:
+        # A timeout the caller's deadline imposed says nothing about the host
+        if budget_capped and isinstance(error, httpx.TimeoutException):
+            return None
+        return False
+
+    async def get(self, url: str, budget: float = None, **kwargs) -> httpx.Response:
+        """GET through the shared pool, respecting the per-host connection cap
+
+        timeout is the host/tool timeout; budget is the caller's remaining
+        deadline. A request cut short by the budget is not held against the
+        host's circuit breaker.
+        """
+        extensions = kwargs.pop("extensions", {})
+        extensions["trace"] = self._trace
+
+        host = urlparse(str(url)).netloc
+        breaker = self.breakers.get(host)
+        breaker.before_request()
+        kwargs["timeout"], budget_capped = self._timeout(breaker, kwargs.get("timeout"), budget)
+        limit = await self._acquire(url)
+        started = time.perf_counter()
+        ok = None
+        try:
+            response = await self.client.get(url, extensions=extensions, **kwargs)
+            ok = self._healthy(response)
+            return response
+        except Exception as e:
+            ok = self._outcome(e, budget_capped)
+            self.errors_total += 1
+            UPSTREAM_ERRORS.inc(host=host)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            breaker.after_request(ok, elapsed)
+            UPSTREAM_DURATION.observe(elapsed, host=host)
+            limit.release()
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, budget: float = None, **kwargs):
+        """Open a streaming response; the per-host slot is held until the body is closed
+
+        timeout and budget work as in get().
+        """
+        extensions = kwargs.pop("extensions", {})
+        extensions["trace"] = self._trace
+        follow_redirects = kwargs.pop("follow_redirects", False)
+
+        host = urlparse(str(url)).netloc
+        breaker = self.breakers.get(host)
+        breaker.before_request()
+        kwargs["timeout"], budget_capped = self._timeout(breaker, kwargs.get("timeout"), budget)
+        limit = await self._acquire(url)
+        started = time.perf_counter()
+        try:
+            request = self.client.build_request(method, url, extensions=extensions, **kwargs)
+            # The breaker judges the host by the time to response headers
+            ok = None
+            try:
+                response = await self.client.send(request, stream=True, follow_redirects=follow_redirects)
+                ok = self._healthy(response)
+            except Exception as e:
+                ok = self._outcome(e, budget_capped)
+                self.errors_total += 1
+                UPSTREAM_ERRORS.inc(host=host)
+                raise
+            finally:
+                breaker.after_request(ok, time.perf_counter() - started)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+        finally:
+            UPSTREAM_DURATION.observe(time.perf_counter() - started, host=host)
+            limit.release()
+
+    async def warm_up(self, urls: List[str], timeout: float = 3.0) -> Dict[str, bool]:
+        """Open pooled keep-alive connections to upstream hosts before the first request
+
+        Bypasses the circuit breakers: a host that is slow to answer the
+        warm-up request should not start the process with an open circuit.
+        """
+        async def connect(url: str) -> bool:
+            try:
+                await self.client.request("HEAD", url, timeout=timeout, extensions={"trace": self._trace})
+                return True
+            except Exception as e:
+                print(f"⚠️ Warm-up request to {url} failed: {e}")
+                return False
+
+        results = await asyncio.gather(*[connect(url) for url in urls])
+        self.warmed_connections += sum(results)
+        return dict(zip(urls, results))
+
+    def _open_connections(self) -> int:
+        transport = getattr(self._client, "_transport", None)
+        pool = getattr(transport, "_pool", None)
+        return len(getattr(pool, "connections", []) or [])
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool metrics for /health and monitoring"""
+        reused = max(self.requests_total - self.new_connections, 0)
+        return {
+            "open_connections": self._open_connections() if self._client else 0,
+            "requests_total": self.requests_total,
+            "new_connections": self.new_connections,
+            "reuse_ratio": round(reused / self.requests_total, 3) if self.requests_total else 0.0,
+            "errors_total": self.errors_total,
+            "warmed_connections": self.warmed_connections,
+            "wait_time_avg_ms": round(self.wait_time_total / self.requests_total * 1000, 3) if self.requests_total else 0.0,
+            "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_connections_per_host": self.max_connections_per_host,
+        }
+
+# Initialize the shared client pool
+http_client = SharedHTTPClient()
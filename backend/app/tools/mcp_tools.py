@@ -1,9 +1,17 @@
-import httpx
 import asyncio
-from typing import List, Dict, Any
-from bs4 import BeautifulSoup
-import json
-from urllib.parse import urljoin, urlparse
+from typing import List, Dict, Any, Tuple
+import os
+from .http_client import http_client
+from .cache import FetchCache, TTLCache, SingleFlight, normalize_query, batch_memo
+from .html_extract import html_extractor, IncrementalTextExtractor
+from .passage_index import passage_index
+from .shared_store import shared_store
+from .dedup import url_key, content_dedup
+from app.metrics import TOOL_DURATION, TOOL_ERRORS, TOOL_IN_FLIGHT
+
+# Downloads handed to workers waiting on another worker's lease
+SHARED_RESULT_NAMESPACE = "fetch_result"
+SHARED_RESULT_TTL = 10.0
 
 class WebSearchTool:
     """MCP Web Search Tool"""
@@ -11,14 +19,58 @@ class WebSearchTool:
     def __init__(self):
         self.name = "web_search"
         self.description = "Search the web for information"
+        self.api_url = os.getenv("DUCKDUCKGO_API_URL", "https://api.duckduckgo.com/")
+        self.cache = TTLCache(
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 512)),
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", 600))
+        )
+        self.inflight = SingleFlight()
+        self.timeout = float(os.getenv("SEARCH_TIMEOUT", 10))
+        self.deadline_exceeded = 0
+        self.duplicates_removed = 0
+        self.shared_hits = 0
         
-    async def search(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    async def search(self, query: str, max_results: int = 10, timeout: float = None) -> List[Dict[str, Any]]:
         """
         Search the web using DuckDuckGo API (free alternative to Google)
+        
+        Results are cached per normalized query, and identical searches that
+        are already in flight share a single upstream request. timeout is the
+        caller's remaining budget; once it runs out the demo results are
+        returned while a shared upstream request carries on for other callers.
         """
+        with TOOL_IN_FLIGHT.track(tool=self.name), TOOL_DURATION.time(tool=self.name):
+            cache_key = f"{normalize_query(query)}|{max_results}"
+            cached = self.cache.get(cache_key)
+            if cached is None:
+                load = lambda: self.inflight.do(
+                    cache_key, lambda: self._search_upstream(cache_key, query, max_results)
+                )
+                memo = batch_memo.get()
+                work = memo.do(f"search|{cache_key}", load) if memo is not None else load()
+                try:
+                    cached = await (asyncio.wait_for(work, timeout) if timeout is not None else work)
+                except asyncio.TimeoutError:
+                    print(f"Search deadline exceeded: {query}")
+                    self.deadline_exceeded += 1
+                    cached = self._create_demo_results(query)
+            return [dict(result) for result in cached]
+    
+    async def _search_upstream(self, cache_key: str, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Query DuckDuckGo and cache the answer (fallback results are not cached)
+
+        Another worker process may already have the answer in the shared store.
+        Runs with the tool's own timeout: it is shared by every coalesced
+        caller, so no single caller's budget may cut it short.
+        """
+        shared = await shared_store.get("search", cache_key)
+        if shared is not None:
+            self.shared_hits += 1
+            self.cache.set(cache_key, shared)
+            return shared
         try:
             # Using DuckDuckGo Instant Answer API (free)
-            search_url = "https://api.duckduckgo.com/"
+            search_url = self.api_url
             params = {
                 "q": query,
                 "format": "json",
@@ -28,41 +80,65 @@ class WebSearchTool:
                 "skip_disambig": 1
             }
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(search_url, params=params)
-                data = response.json()
-                
-                results = []
-                
-                # Add abstract if available
-                if data.get("Abstract"):
+            response = await http_client.get(search_url, params=params, timeout=self.timeout)
+            data = response.json()
+            
+            results = []
+            
+            # Add abstract if available
+            if data.get("Abstract"):
+                results.append({
+                    "url": data.get("AbstractURL", ""),
+                    "title": data.get("Heading", "Abstract"),
+                    "snippet": data.get("Abstract", ""),
+                    "source": "DuckDuckGo Abstract"
+                })
+            
+            # Add related topics
+            for topic in data.get("RelatedTopics", [])[:max_results-1]:
+                if isinstance(topic, dict) and "Text" in topic:
                     results.append({
-                        "url": data.get("AbstractURL", ""),
-                        "title": data.get("Heading", "Abstract"),
-                        "snippet": data.get("Abstract", ""),
-                        "source": "DuckDuckGo Abstract"
+                        "url": topic.get("FirstURL", ""),
+                        "title": topic.get("Text", "")[:100],
+                        "snippet": topic.get("Text", ""),
+                        "source": "DuckDuckGo Related"
                     })
-                
-                # Add related topics
-                for topic in data.get("RelatedTopics", [])[:max_results-1]:
-                    if isinstance(topic, dict) and "Text" in topic:
-                        results.append({
-                            "url": topic.get("FirstURL", ""),
-                            "title": topic.get("Text", "")[:100],
-                            "snippet": topic.get("Text", ""),
-                            "source": "DuckDuckGo Related"
-                        })
-                
-                # If no results, create mock results for demo
-                if not results:
-                    results = self._create_demo_results(query)
-                    
-                return results[:max_results]
+            
+            # If no results, create mock results for demo
+            if not results:
+                results = self._create_demo_results(query)
+            
+            results = self._dedupe(results)[:max_results]
+            self.cache.set(cache_key, results)
+            await shared_store.set("search", cache_key, results, ttl=self.cache.ttl)
+            return results
                 
         except Exception as e:
             print(f"Search error: {e}")
+            TOOL_ERRORS.inc(tool=self.name)
             return self._create_demo_results(query)
     
+    def _dedupe(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep only the first result per page, comparing canonical URL keys"""
+        seen = set()
+        unique = []
+        for result in results:
+            if result["url"]:
+                key = url_key(result["url"])
+                if key in seen:
+                    self.duplicates_removed += 1
+                    continue
+                seen.add(key)
+            unique.append(result)
+        return unique
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "deadline_exceeded": self.deadline_exceeded,
+            "duplicates_removed": self.duplicates_removed,
+            "shared_hits": self.shared_hits
+        }
+    
     def _create_demo_results(self, query: str) -> List[Dict[str, Any]]:
         """Create demo results for testing"""
         return [
@@ -70,13 +146,15 @@ class WebSearchTool:
                 "url": "https://en.wikipedia.org/wiki/Example",
                 "title": f"About {query} - Wikipedia",
                 "snippet": f"This is demo content about {query}. Wikipedia is a free online encyclopedia.",
-                "source": "Demo Wikipedia"
+                "source": "Demo Wikipedia",
+                "status": "demo"
             },
             {
                 "url": "https://www.example.com/article",
                 "title": f"{query} - Complete Guide",
                 "snippet": f"Learn everything about {query} in this comprehensive guide with examples.",
-                "source": "Demo Article"
+                "source": "Demo Article",
+                "status": "demo"
             }
         ]
 
@@ -87,55 +165,247 @@ class WebFetchTool:
         self.name = "web_fetch"
         self.description = "Fetch content from URLs"
         self.max_content_length = 10000
+        self.cache = FetchCache()
+        self.inflight = SingleFlight()
+        self.timeout = float(os.getenv("FETCH_TIMEOUT", 15))
+        self.deadline_exceeded = 0
+        self.shared_results = 0
+        
+        # Streaming mode stops reading once enough text (or max_bytes) is in.
+        # It always parses with html.parser, so it is off by default to keep
+        # the HTML_PARSER choice and the bulk parse in html_extractor's pool
+        self.streaming = os.getenv("FETCH_STREAMING", "false").lower() in ("1", "true", "yes")
+        # Decoded text handed to the parser thread at a time in streaming mode
+        self.feed_chars = int(os.getenv("FETCH_STREAMING_FEED_CHARS", 65536))
+        # Most of a page that is ever downloaded, streaming or not
+        self.max_bytes = int(os.getenv("FETCH_MAX_BYTES", 2_000_000))
+        self.allowed_content_types = {"text/html", "application/xhtml+xml", "text/plain"}
+        self.bytes_read_total = 0
+        self.bytes_skipped_total = 0
+        self.early_stops = 0
+        self.rejected_content_type = 0
     
-    async def fetch(self, url: str, max_chars: int = 10000) -> Dict[str, Any]:
+    async def fetch(self, url: str, max_chars: int = 10000, timeout: float = None) -> Dict[str, Any]:
         """
         Fetch and parse content from a URL
+        
+        Concurrent fetches of the same page share one download, and inside a
+        batch every question reuses the first fetch of a URL. The URL itself
+        is downloaded as given; its canonical form only keys the cache, so
+        variants differing in tracking parameters share an entry. result["url"]
+        is the URL that was actually downloaded, so a variant served from the
+        cache reports the first-seen form of the page (the one it is indexed
+        and cited under). A URL already known to mirror another page is served
+        from that page instead of being downloaded again; such results carry
+        duplicate_of. timeout is the caller's remaining budget; past it the
+        demo content is returned.
         """
+        with TOOL_IN_FLIGHT.track(tool=self.name), TOOL_DURATION.time(tool=self.name):
+            # Known mirrors are served from the page they duplicate
+            original = content_dedup.original_of(url)
+            if original is not None:
+                url = original
+            cache_key = self.cache.key(url or "", max_chars)
+            load = lambda: self.inflight.do(cache_key, lambda: self._fetch(url, max_chars))
+            memo = batch_memo.get()
+            work = memo.do(f"fetch|{cache_key}", load) if memo is not None else load()
+            try:
+                result = await (asyncio.wait_for(work, timeout) if timeout is not None else work)
+            except asyncio.TimeoutError:
+                print(f"Fetch deadline exceeded for {url}")
+                self.deadline_exceeded += 1
+                return self._create_demo_content(url, error="deadline exceeded")
+            if original is not None and result.get("status") == "success":
+                return dict(result, duplicate_of=original)
+            return dict(result)
+    
+    async def _fetch(self, url: str, max_chars: int) -> Dict[str, Any]:
+        # Shared by every coalesced caller, so it runs with the tool's own timeout
+        timeout = self.timeout
+        leased = False
+        cache_key = self.cache.key(url or "", max_chars)
         try:
             if not url or url.startswith("https://www.example.com"):
                 # Return demo content for demo URLs
                 return self._create_demo_content(url)
             
-            async with httpx.AsyncClient(
-                timeout=15.0,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-            ) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                # Parse HTML content
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Remove script and style elements
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                
-                # Get text content
-                text = soup.get_text()
-                
-                # Clean up text
-                lines = (line.strip() for line in text.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                text = ' '.join(chunk for chunk in chunks if chunk)
+            # Serve fresh copies from cache, revalidate stale ones
+            cached = await self.cache.alookup(cache_key)
+            if cached and self.cache.is_fresh(cached):
+                return dict(self._index(cached["result"], cached["expires_at"]), cache="hit")
+            
+            # Another worker process is downloading this page: use its result
+            leased = await shared_store.lease(SHARED_RESULT_NAMESPACE, cache_key, ttl=timeout)
+            if leased and shared_store.enabled:
+                # The previous holder may have finished between our lookup and our lease
+                shared = await shared_store.get(SHARED_RESULT_NAMESPACE, cache_key)
+            elif not leased:
+                shared = await shared_store.wait_for(SHARED_RESULT_NAMESPACE, cache_key, timeout=timeout)
+            else:
+                shared = None
+            if shared is not None:
+                self.shared_results += 1
+                return dict(self._index(shared), cache="shared")
+            
+            headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+            }
+            if cached:
+                headers.update(self.cache.conditional_headers(cached))
+                self.cache.revalidations += 1
+            
+            async with http_client.stream("GET", url, timeout=timeout, headers=headers) as response:
+                # Not modified - skip both the download and the parse
+                if cached and response.status_code == 304:
+                    refreshed = self.cache.refresh(cache_key, cached, response.headers)
+                    await self._share(cache_key, cached["result"])
+                    return dict(self._index(cached["result"], refreshed["expires_at"]), cache="revalidated")
                 
-                # Limit content length
-                if len(text) > max_chars:
-                    text = text[:max_chars] + "..."
+                response.raise_for_status()
+                self._check_content_type(response)
                 
-                return {
-                    "url": url,
-                    "title": soup.title.string if soup.title else "No Title",
-                    "content": text,
-                    "length": len(text),
-                    "status": "success"
-                }
+                if self.streaming:
+                    # Stop downloading once enough text or the byte budget is reached
+                    page = await self._read_incremental(response, max_chars)
+                else:
+                    # Download up to the byte budget, then parse off the event loop
+                    html, truncated = await self._read_capped(response)
+                    page = await html_extractor.extract(html, max_chars)
+                    page.update(self._byte_counts(response, truncated=truncated))
+            
+            text = page["content"]
+            result = {
+                "url": url,
+                "title": page["title"],
+                "content": text,
+                "length": len(text),
+                "status": "success",
+                "bytes_read": page["bytes_read"],
+                "bytes_skipped": page["bytes_skipped"],
+                "truncated": page["truncated"]
+            }
+            entry = self.cache.store(cache_key, result, response.headers)
+            await self._share(cache_key, result)
+            return dict(self._index(result, entry["expires_at"] if entry else None), cache="miss")
                 
         except Exception as e:
             print(f"Fetch error for {url}: {e}")
+            TOOL_ERRORS.inc(tool=self.name)
             return self._create_demo_content(url, error=str(e))
+        finally:
+            if leased:
+                await shared_store.release(SHARED_RESULT_NAMESPACE, cache_key)
+    
+    async def _share(self, cache_key: str, result: Dict[str, Any]):
+        """Hand a fresh download to the other workers
+
+        Workers waiting on this download read the result itself, even for
+        pages that must not be cached, just as concurrent callers in one
+        process share a download through SingleFlight. Cacheable pages are
+        also published as a cache entry.
+        """
+        await shared_store.set(SHARED_RESULT_NAMESPACE, cache_key, result, ttl=SHARED_RESULT_TTL)
+        await self.cache.share(cache_key)
+    
+    def _index(self, result: Dict[str, Any], expires_at: float = None) -> Dict[str, Any]:
+        """Add fetched text to the shared passage index unless it duplicates an indexed page
+
+        expires_at is the freshness of the page's fetch cache entry (None if
+        it is not cached). Returns the result, marked with duplicate_of when
+        it is a near-copy.
+        """
+        original = content_dedup.check(result["url"], result["content"])
+        if original is not None and original in passage_index:
+            return dict(result, duplicate_of=original)
+        passage_index.add_document(result["url"], result["title"], result["content"], expires_at)
+        return result
+    
+    def _check_content_type(self, response):
+        """Reject non-HTML bodies before any of them are downloaded"""
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in self.allowed_content_types:
+            self.rejected_content_type += 1
+            self.bytes_skipped_total += int(response.headers.get("content-length") or 0)
+            raise ValueError(f"Unsupported content type: {content_type}")
+    
+    def _byte_counts(self, response, truncated: bool) -> Dict[str, Any]:
+        bytes_read = response.num_bytes_downloaded
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit():
+            bytes_skipped = max(int(content_length) - bytes_read, 0)
+            truncated = truncated and bytes_skipped > 0
+        else:
+            # Unknown total size: we only know something was left unread
+            bytes_skipped = None
+        
+        self.bytes_read_total += bytes_read
+        self.bytes_skipped_total += bytes_skipped or 0
+        if truncated:
+            self.early_stops += 1
+        return {"bytes_read": bytes_read, "bytes_skipped": bytes_skipped, "truncated": truncated}
+    
+    async def _read_capped(self, response) -> Tuple[str, bool]:
+        """Read the body as text, stopping at max_bytes; True when part of it was left unread"""
+        content_length = response.headers.get("content-length")
+        # A declared size over the budget is known to be cut short before reading
+        truncated = bool(content_length and content_length.isdigit() and int(content_length) > self.max_bytes)
+        chunks, size = [], 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                truncated = True
+                break
+        body = b"".join(chunks)[:self.max_bytes]
+        return body.decode(response.charset_encoding or "utf-8", errors="replace"), truncated
+    
+    async def _read_incremental(self, response, max_chars: int) -> Dict[str, Any]:
+        """Feed the body to an incremental extractor until it has enough text
+
+        Chunks are collected into feed_chars batches and parsed in a worker
+        thread, so the event loop never runs the parser itself (unless
+        HTML_PARSE_EXECUTOR is inline, which parses on the loop by design).
+        """
+        extractor = IncrementalTextExtractor(max_chars)
+        inline = html_extractor.mode == "inline"
+        truncated = False
+        pending, pending_chars = [], 0
+        async for chunk in response.aiter_text():
+            pending.append(chunk)
+            pending_chars += len(chunk)
+            at_limit = response.num_bytes_downloaded >= self.max_bytes
+            if pending_chars < self.feed_chars and not at_limit:
+                continue
+            text, pending, pending_chars = "".join(pending), [], 0
+            if inline:
+                extractor.feed(text)
+            else:
+                await asyncio.to_thread(extractor.feed, text)
+            if extractor.done or at_limit:
+                truncated = True
+                break
+        text = "".join(pending)
+        if inline:
+            extractor.feed(text)
+            extractor.close()
+        else:
+            await asyncio.to_thread(lambda: (extractor.feed(text), extractor.close()))
+        
+        page = extractor.result()
+        page.update(self._byte_counts(response, truncated=truncated))
+        return page
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "streaming": self.streaming,
+            "max_bytes": self.max_bytes,
+            "bytes_read_total": self.bytes_read_total,
+            "bytes_skipped_total": self.bytes_skipped_total,
+            "early_stops": self.early_stops,
+            "rejected_content_type": self.rejected_content_type,
+            "shared_results": self.shared_results,
+            "deadline_exceeded": self.deadline_exceeded
+        }
     
     def _create_demo_content(self, url: str, error: str = None) -> Dict[str, Any]:
         """Create demo content for testing"""
@@ -0,0 +1,207 @@
+import os
+import re
+import math
+import time
+from array import array
+from collections import OrderedDict, Counter
+from typing import Dict, Any, Collection, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its of on or "
+    "that the their this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def split_passages(text: str, passage_chars: int) -> List[str]:
+    """Pack sentences into passages of roughly passage_chars characters"""
+    passages, current = [], ""
+    for sentence in _SENTENCE_RE.split(text):
+        if current and len(current) + len(sentence) + 1 > passage_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+        # Hard-wrap text that has no sentence breaks
+        while len(current) > passage_chars * 2:
+            cut = current.rfind(" ", 0, passage_chars)
+            cut = cut if cut > 0 else passage_chars
+            passages.append(current[:cut])
+            current = current[cut:].lstrip()
+    if current.strip():
+        passages.append(current)
+    return passages
+
+
+class PassageIndex:
+    """In-process BM25 index over passages of every page WebFetchTool returns
+
+    Postings are kept per term as two parallel typed arrays (passage ids and
+    term frequencies) and passage lengths in a third, which keeps the index
+    compact and makes scoring a tight loop over contiguous arrays. The index
+    is shared across requests and bounded by max_passages; the oldest pages
+    are evicted first and their postings are compacted away lazily. Each page
+    remembers when its fetch cache entry expires, so callers can tell a page
+    that is still fresh from one that would have to be fetched again.
+    """
+
+    def __init__(self, max_passages: int = None, passage_chars: int = None, k1: float = 1.2, b: float = 0.75):
+        self.max_passages = max_passages or int(os.getenv("PASSAGE_INDEX_MAX_PASSAGES", 20000))
+        self.passage_chars = passage_chars or int(os.getenv("PASSAGE_INDEX_PASSAGE_CHARS", 600))
+        self.k1 = k1
+        self.b = b
+        self._reset()
+        self.evicted_documents = 0
+        self.queries = 0
+
+    def _reset(self):
+        self._passages: List[Optional[Tuple[str, str]]] = []  # pid -> (url, text), None once evicted
+        self._lengths = array("I")
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._df: Counter = Counter()
+        self._documents: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._live_passages = 0
+        self._live_length = 0
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._documents
+
+    def add_document(self, url: str, title: str, text: str, expires_at: Optional[float] = None) -> int:
+        """Index a page's passages, replacing any earlier copy of the same URL
+
+        expires_at is when the page's fetch cache entry goes stale; None for
+        pages that were not cached, which are never fresh.
+        """
+        if not url or not text:
+            return 0
+        existing = self._documents.get(url)
+        if existing is not None and existing["length"] == len(text):
+            existing["expires_at"] = expires_at
+            self._documents.move_to_end(url)
+            return 0
+        if existing is not None:
+            self._remove_document(url)
+
+        pids = []
+        for passage in split_passages(text, self.passage_chars):
+            counts = Counter(tokenize(passage))
+            if not counts:
+                continue
+            pid = len(self._passages)
+            self._passages.append((url, passage))
+            length = sum(counts.values())
+            self._lengths.append(length)
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = (array("I"), array("H"))
+                    self._postings[term] = postings
+                postings[0].append(pid)
+                postings[1].append(min(tf, 65535))
+                self._df[term] += 1
+            self._live_passages += 1
+            self._live_length += length
+            pids.append(pid)
+
+        self._documents[url] = {"title": title, "pids": pids, "length": len(text), "expires_at": expires_at}
+        self._evict()
+        return len(pids)
+
+    def _remove_document(self, url: str):
+        document = self._documents.pop(url, None)
+        if document is None:
+            return
+        for pid in document["pids"]:
+            _, passage = self._passages[pid]
+            for term in set(tokenize(passage)):
+                self._df[term] -= 1
+                if self._df[term] <= 0:
+                    del self._df[term]
+            self._live_passages -= 1
+            self._live_length -= self._lengths[pid]
+            self._passages[pid] = None
+
+    def _evict(self):
+        while self._live_passages > self.max_passages and len(self._documents) > 1:
+            self._remove_document(next(iter(self._documents)))
+            self.evicted_documents += 1
+        # Rebuild once most stored postings point at evicted passages
+        if len(self._passages) > 2 * max(self._live_passages, 1) and len(self._passages) > 1000:
+            self._compact()
+
+    def _compact(self):
+        documents = [(url, doc["title"], [self._passages[pid][1] for pid in doc["pids"]], doc["expires_at"])
+                     for url, doc in self._documents.items()]
+        self._reset()
+        for url, title, passages, expires_at in documents:
+            self.add_document(url, title, " ".join(passages), expires_at)
+
+    def is_fresh(self, url: str) -> bool:
+        """True while the page's fetch cache entry has not expired"""
+        document = self._documents.get(url)
+        return document is not None and document["expires_at"] is not None and document["expires_at"] > time.time()
+
+    def search(self, query: str, k: int = 5, urls: Collection[str] = None) -> List[Dict[str, Any]]:
+        """Top-k passages by BM25 score, with the share of query terms each one covers
+
+        urls restricts the ranking to passages of those pages; collection
+        statistics (document frequencies, average length) still cover the
+        whole index.
+        """
+        self.queries += 1
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self._live_passages or (urls is not None and not urls):
+            return []
+
+        n = self._live_passages
+        avg_length = self._live_length / n
+        lengths = self._lengths
+        passages = self._passages
+        k1, b = self.k1, self.b
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+
+        for term in terms:
+            df = self._df.get(term, 0)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            pids, tfs = self._postings[term]
+            for pid, tf in zip(pids, tfs):
+                if passages[pid] is None or (urls is not None and passages[pid][0] not in urls):
+                    continue
+                norm = k1 * (1 - b + b * lengths[pid] / avg_length)
+                scores[pid] = scores.get(pid, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+                matched[pid] = matched.get(pid, 0) + 1
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        results = []
+        for pid, score in top:
+            url, passage = passages[pid]
+            results.append({
+                "url": url,
+                "title": self._documents[url]["title"],
+                "passage": passage,
+                "score": round(score, 4),
+                "coverage": round(matched[pid] / len(terms), 3),
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._documents),
+            "passages": self._live_passages,
+            "max_passages": self.max_passages,
+            "terms": len(self._df),
+            "postings_bytes": sum(ids.itemsize * len(ids) + tfs.itemsize * len(tfs) for ids, tfs in self._postings.values()),
+            "evicted_documents": self.evicted_documents,
+            "queries": self.queries,
+        }
+
+# Initialize the shared passage index
+passage_index = PassageIndex()
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_updated_at ON entries (updated_at);
+CREATE TABLE IF NOT EXISTS leases (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+
+class SharedStore:
+    """Cache tier shared by every worker process on the host, in SQLite WAL mode
+
+    Disabled unless SHARED_CACHE_PATH is set (the production launcher sets
+    it when running more than one worker). WAL lets readers in all workers
+    proceed while one writer commits, and synchronous=NORMAL skips the
+    fsync per commit, which is fine for a cache. All SQLite work, including
+    JSON encoding, runs in worker threads with one connection per thread,
+    so the event loop never blocks on the database.
+
+    Leases let one worker download a URL while the others wait for its
+    result instead of downloading it too. Any error is counted and treated
+    as a miss; the store never fails a request.
+    """
+
+    def __init__(self, path: str = None, max_rows: int = None, busy_timeout_ms: int = None,
+                 purge_every: int = 500):
+        self.path = path if path is not None else os.getenv("SHARED_CACHE_PATH", "")
+        self.enabled = bool(self.path)
+        self.max_rows = max_rows or int(os.getenv("SHARED_CACHE_MAX_ROWS", 50000))
+        self.busy_timeout = (busy_timeout_ms or int(os.getenv("SHARED_CACHE_BUSY_TIMEOUT_MS", 2000))) / 1000
+        self.purge_every = purge_every
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._writes_since_purge = 0
+        self._initialized = False
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.purged = 0
+        self.leases_won = 0
+        self.lease_waits = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+                self._connections.append(conn)
+            self._local.conn = conn
+        return conn
+
+    async def _run(self, fn, *args):
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache error: {e}")
+            return None
+
+    def _get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def _set(self, namespace: str, key: str, value: Any, ttl: Optional[float]):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, default=str), now + ttl if ttl is not None else None, now)
+        )
+        self._writes_since_purge += 1
+        if self._writes_since_purge >= self.purge_every:
+            self._writes_since_purge = 0
+            self._purge(conn, now)
+
+    def _purge(self, conn: sqlite3.Connection, now: float):
+        """Drop expired rows, then the least recently written ones beyond max_rows"""
+        removed = conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)).rowcount
+        excess = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_rows
+        if excess > 0:
+            removed += conn.execute(
+                "DELETE FROM entries WHERE (namespace, key) IN "
+                "(SELECT namespace, key FROM entries ORDER BY updated_at LIMIT ?)", (excess,)
+            ).rowcount
+        conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+        self.purged += removed
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        value = await self._run(self._get, namespace, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a JSON-serializable value; ttl None keeps it until purged for space"""
+        if not self.enabled:
+            return
+        await self._run(self._set, namespace, key, value, ttl)
+        self.writes += 1
+
+    def _lease(self, namespace: str, key: str, ttl: float) -> bool:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT expires_at FROM leases WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            won = row is None or row[0] <= now
+            if won:
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases (namespace, key, owner, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, os.getpid(), now + ttl)
+                )
+            conn.execute("COMMIT")
+            return won
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _release(self, namespace: str, key: str):
+        self._connection().execute(
+            "DELETE FROM leases WHERE namespace = ? AND key = ? AND owner = ?", (namespace, key, os.getpid())
+        )
+
+    def _poll(self, namespace: str, key: str) -> Tuple[Optional[Any], bool]:
+        """The stored value, and whether another worker still holds the lease"""
+        value = self._get(namespace, key)
+        if value is not None:
+            return value, False
+        row = self._connection().execute(
+            "SELECT expires_at FROM leases WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return None, row is not None and row[0] > time.time()
+
+    async def lease(self, namespace: str, key: str, ttl: float) -> bool:
+        """True if this worker should do the work for key; True as well when the store is off"""
+        if not self.enabled:
+            return True
+        won = await self._run(self._lease, namespace, key, ttl)
+        # A broken store must not stop this worker from doing the work itself
+        won = won is not False
+        if won:
+            self.leases_won += 1
+        return won
+
+    async def release(self, namespace: str, key: str):
+        if self.enabled:
+            await self._run(self._release, namespace, key)
+
+    async def wait_for(self, namespace: str, key: str, timeout: float, interval: float = 0.05) -> Optional[Any]:
+        """Wait for the value the lease holder stores under the same namespace and key
+
+        Returns None once the lease is released or expires without a value, or
+        after timeout seconds.
+        """
+        self.lease_waits += 1
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(interval)
+            polled = await self._run(self._poll, namespace, key)
+            if polled is None:
+                return None
+            value, leased = polled
+            if value is not None:
+                self.hits += 1
+                return value
+            if not leased:
+                return None
+        return None
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "purged": self.purged,
+            "leases_won": self.leases_won,
+            "lease_waits": self.lease_waits,
+            "errors": self.errors,
+        }
+
+# Initialize the process-wide shared cache tier
+shared_store = SharedStore()
@@ -0,0 +1,83 @@
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Optional
+
+# Converts time.monotonic_ns() readings to wall-clock time when serializing
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+TRACE_LEVELS = ("none", "summary", "full")
+DEFAULT_TRACE_LEVEL = os.getenv("TRACE_VERBOSITY", "full")
+
+
+class TraceRecord:
+    """One step of a research request
+
+    Recording only stores references and a monotonic nanosecond timestamp;
+    the ISO timestamp and the dict form are produced when the record is
+    serialized, which most records never are at lower verbosity.
+    """
+
+    __slots__ = ("at_ns", "agent", "action", "tool", "input", "output", "status", "duration_ms")
+
+    def __init__(self, agent: str, action: str, tool: str, input: Dict[str, Any] = None,
+                 output: Dict[str, Any] = None, status: str = "success", duration_ms: float = 0.0,
+                 at_ns: int = None):
+        self.at_ns = at_ns if at_ns is not None else time.monotonic_ns()
+        self.agent = agent
+        self.action = action
+        self.tool = tool
+        self.input = input if input is not None else {}
+        self.output = output if output is not None else {}
+        self.status = status
+        self.duration_ms = duration_ms
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp((self.at_ns + _WALL_OFFSET_NS) / 1e9).isoformat()
+
+    def summary(self) -> Dict[str, Any]:
+        return {"agent": self.agent, "action": self.action, "status": self.status, "duration_ms": self.duration_ms}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "agent": self.agent,
+            "action": self.action,
+            "tool": self.tool,
+            "input": self.input,
+            "output": self.output,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TraceRecord":
+        """Rebuild a record serialized with to_dict (e.g. by another worker process)"""
+        fields = dict(data)
+        wall_ns = int(datetime.fromisoformat(fields.pop("timestamp")).timestamp() * 1e9)
+        return cls(at_ns=wall_ns - _WALL_OFFSET_NS, **fields)
+
+    def __repr__(self) -> str:
+        return f"TraceRecord({self.agent}.{self.action} {self.status} {self.duration_ms}ms)"
+
+
+def resolve_level(level: Optional[str]) -> str:
+    level = level or DEFAULT_TRACE_LEVEL
+    return level if level in TRACE_LEVELS else "full"
+
+
+def render_trace(records: Iterable[TraceRecord], level: str = "full") -> List[Dict[str, Any]]:
+    """Serialize a trace at the requested verbosity"""
+    if level == "none":
+        return []
+    if level == "summary":
+        return [record.summary() for record in records]
+    return [record.to_dict() for record in records]
+
+
+def render_entry(record: TraceRecord, level: str = "full") -> Optional[Dict[str, Any]]:
+    """Serialize a single streamed record, or None when it should not be sent"""
+    if level == "none":
+        return None
+    return record.summary() if level == "summary" else record.to_dict()
@@ -0,0 +1,76 @@
+"""
+Event-loop lag benchmark for HTML extraction.
+
+Parses synthetic pages concurrently with each HTMLExtractor mode while a
+ticker coroutine measures how late the event loop wakes it up. High lag
+means other /api/ask requests would have been stalled by parsing.
+
+Run from the backend directory:
+    python -m benchmarks.bench_event_loop --pages 16 --size-kb 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.tools.html_extract import HTMLExtractor
+
+
+def make_page(size_kb: int) -> str:
+    paragraph = "<p>Python is a high-level programming language. <b>Readable</b> and <i>versatile</i>.</p>\n"
+    body = paragraph * max(1, (size_kb * 1024) // len(paragraph))
+    return f"<html><head><title>Bench</title><script>var x = 1;</script></head><body>{body}</body></html>"
+
+
+async def measure_lag(stop: asyncio.Event, interval: float, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def run_mode(mode: str, html: str, pages: int, workers: int, parser: str) -> dict:
+    extractor = HTMLExtractor(mode=mode, workers=workers, parser=parser)
+    # Warm up the pool so worker start-up is not counted
+    await extractor.extract("<html></html>", 10)
+
+    stop = asyncio.Event()
+    lags = []
+    ticker = asyncio.create_task(measure_lag(stop, 0.001, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*[extractor.extract(html, 5000) for _ in range(pages)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    extractor.shutdown()
+
+    lags.sort()
+    return {
+        "mode": mode,
+        "parser": extractor.parser,
+        "wall_s": round(elapsed, 3),
+        "lag_p50_ms": round(statistics.median(lags), 2) if lags else 0.0,
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1], 2) if lags else 0.0,
+        "lag_max_ms": round(lags[-1], 2) if lags else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=16, help="concurrent pages to parse")
+    parser.add_argument("--size-kb", type=int, default=500, help="size of each synthetic page")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--parser", default="auto", help="auto, lxml or html.parser")
+    parser.add_argument("--modes", default="inline,thread,process")
+    args = parser.parse_args()
+
+    html = make_page(args.size_kb)
+    print(f"Parsing {args.pages} x {args.size_kb} KB pages")
+    print(f"{'mode':<8} {'parser':<12} {'wall_s':>8} {'lag_p50':>9} {'lag_p99':>9} {'lag_max':>9}")
+    for mode in args.modes.split(","):
+        r = await run_mode(mode.strip(), html, args.pages, args.workers, args.parser)
+        print(f"{r['mode']:<8} {r['parser']:<12} {r['wall_s']:>8} {r['lag_p50_ms']:>9} {r['lag_p99_ms']:>9} {r['lag_max_ms']:>9}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
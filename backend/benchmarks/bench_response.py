@@ -0,0 +1,122 @@
+"""
+Response encoding benchmark for /api/ask.
+
+Answers one question in-process against local fake upstreams to get a
+realistic result with a real trace, then serializes it for each response
+mode (trace full, summary, none, and answer-only fields) with FastAPI's
+default JSON path and with the fast encoder, and compresses the fast body
+with each available content coding. Reports median serialization and
+compression time and the bytes that would go on the wire.
+
+Run from the backend directory:
+    python -m benchmarks.bench_response --iterations 200 --output response.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_upstream import start_fake_upstreams
+
+# mode name -> (trace level, fields)
+MODES = {
+    "full": ("full", None),
+    "summary": ("summary", None),
+    "none": ("none", None),
+    "answer_only": ("none", ["answer", "citations", "partial"]),
+}
+
+
+def median_us(fn: Callable[[], Any], iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return round(statistics.median(timings), 1)
+
+
+async def answer(question: str) -> Dict[str, Any]:
+    from app.services.orchestrator import orchestrator
+    from app.tools.http_client import http_client
+    try:
+        return await orchestrator.process_query(question, deadline_ms=0)
+    finally:
+        await http_client.close()
+
+
+def bench_mode(result: Dict[str, Any], level: str, fields: Optional[List[str]], iterations: int) -> Dict[str, Any]:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from app import encoding
+    from main import present
+
+    body = present(result, level, fields)
+    default_bytes = JSONResponse(jsonable_encoder(body)).body
+    fast_bytes = encoding.dumps(body)
+    row = {
+        "trace_entries": len(body.get("trace", [])),
+        "present_us": median_us(lambda: present(result, level, fields), iterations),
+        "serialize_us": {
+            "fastapi_default": median_us(lambda: JSONResponse(jsonable_encoder(body)).body, iterations),
+            encoding.stats()["json_encoder"]: median_us(lambda: encoding.dumps(body), iterations),
+        },
+        "bytes": {"fastapi_default": len(default_bytes), "identity": len(fast_bytes)},
+        "compress_us": {},
+    }
+    for coding in encoding.stats()["codings"]:
+        row["bytes"][coding] = len(encoding.compress(fast_bytes, coding))
+        row["compress_us"][coding] = median_us(lambda: encoding.compress(fast_bytes, coding), iterations)
+    return row
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="timed repetitions per measurement")
+    parser.add_argument("--question", default="What is Python programming language used for?")
+    parser.add_argument("--page-kb", type=int, default=100, help="size of the fake pages behind the answer")
+    parser.add_argument("--output", default="response.json")
+    args = parser.parse_args()
+
+    upstreams = start_fake_upstreams({
+        "search_latency_ms": 0, "search_jitter_ms": 0,
+        "content_latency_ms": 0, "content_jitter_ms": 0, "page_kb": args.page_kb,
+    })
+    os.environ["DUCKDUCKGO_API_URL"] = upstreams["search"].url
+    os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+    try:
+        result = asyncio.run(answer(args.question))
+    finally:
+        for server in upstreams.values():
+            server.stop()
+
+    from app import encoding
+    results: Dict[str, Any] = {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "encoding": encoding.stats(),
+        "modes": {},
+    }
+    print(f"🧾 encoder {results['encoding']['json_encoder']}, codings {', '.join(results['encoding']['codings'])}")
+    for name, (level, fields) in MODES.items():
+        row = bench_mode(result, level, fields, args.iterations)
+        results["modes"][name] = row
+        timings = ", ".join(f"{k} {v}us" for k, v in row["serialize_us"].items())
+        sizes = ", ".join(f"{k} {v}B" for k, v in row["bytes"].items())
+        print(f"📦 {name:<12} serialize: {timings} | wire: {sizes}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Cold-start benchmark for the research API.
+
+Profiles the import of main with `python -X importtime`, then launches the
+API against local fake upstreams several times and measures how long each
+process takes to answer /health and its first /api/ask. Run with and
+without --warmup to see what pre-connecting to upstreams buys the first
+request.
+
+Run from the backend directory:
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --runs 5 --warmup --output warm.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Any, List
+
+import httpx
+
+from benchmarks.fake_upstream import start_fake_upstreams, free_port
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(top: int) -> Dict[str, Any]:
+    """Cumulative import cost of main, by module and by top-level package"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    modules: List[Dict[str, Any]] = []
+    packages: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append({"module": name, "cumulative_ms": int(cumulative_us) / 1000, "self_ms": int(self_us) / 1000})
+        # Only modules imported directly by main count towards a package total,
+        # nested imports are already part of their parent's cumulative time
+        if (len(indent) - 1) // 2 == 1:
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0.0) + int(cumulative_us) / 1000
+
+    total = next((m["cumulative_ms"] for m in modules if m["module"] == "main"), None)
+    return {
+        "total_ms": total,
+        "top_modules": sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "packages": dict(sorted(((k, round(v, 2)) for k, v in packages.items()), key=lambda kv: kv[1], reverse=True)),
+    }
+
+
+def measure_launch(search_url: str, extra_env: Dict[str, str], question: str) -> Dict[str, Any]:
+    """Spawn one API process and time it until healthy and until its first answer"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, DUCKDUCKGO_API_URL=search_url, **extra_env)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        health = None
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                response = httpx.get(f"{base_url}/health", timeout=1.0)
+                if response.status_code == 200:
+                    health = response.json()
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        if health is None:
+            raise RuntimeError("API server did not become healthy")
+        healthy_ms = (time.perf_counter() - started) * 1000
+
+        asked = time.perf_counter()
+        response = httpx.post(f"{base_url}/api/ask", json={"question": question, "trace_level": "none"}, timeout=60.0)
+        response.raise_for_status()
+        first_answer_ms = (time.perf_counter() - asked) * 1000
+        return {
+            "healthy_ms": round(healthy_ms, 2),
+            "first_answer_ms": round(first_answer_ms, 2),
+            "total_ms": round(healthy_ms + first_answer_ms, 2),
+            "startup": health.get("startup", {}),
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = {}
+    for field in ("healthy_ms", "first_answer_ms", "total_ms"):
+        values = [run[field] for run in runs]
+        summary[field] = {
+            "median": round(statistics.median(values), 2),
+            "min": round(min(values), 2),
+            "max": round(max(values), 2),
+        }
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="server launches to measure")
+    parser.add_argument("--warmup", action="store_true", help="enable WARMUP_ENABLED in the spawned API")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to report")
+    parser.add_argument("--search-latency-ms", type=float, default=50)
+    parser.add_argument("--content-latency-ms", type=float, default=100)
+    parser.add_argument("--skip-imports", action="store_true", help="skip the -X importtime profile")
+    parser.add_argument("--output", default="cold_start.json")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "config": vars(args),
+    }
+
+    if not args.skip_imports:
+        imports = profile_imports(args.top)
+        results["imports"] = imports
+        print(f"📦 import main: {imports['total_ms']}ms")
+        for module in imports["top_modules"]:
+            print(f"   {module['cumulative_ms']:>9.2f}ms  {module['module']}")
+        print("   by package: " + ", ".join(f"{name} {ms}ms" for name, ms in list(imports["packages"].items())[:8]))
+
+    upstreams = start_fake_upstreams({
+        "search_latency_ms": args.search_latency_ms,
+        "content_latency_ms": args.content_latency_ms,
+    })
+    extra_env = {
+        "WARMUP_ENABLED": "true" if args.warmup else "false",
+        # Every run must reach the upstreams rather than a cache from an earlier run
+        "ANSWER_CACHE_ENABLED": "false",
+    }
+    runs = []
+    try:
+        for index in range(args.runs):
+            run = measure_launch(upstreams["search"].url, extra_env, f"Cold start question {index}")
+            runs.append(run)
+            print(f"🚀 run {index + 1}: healthy {run['healthy_ms']}ms, first answer {run['first_answer_ms']}ms")
+    finally:
+        for server in upstreams.values():
+            server.stop()
+
+    results["runs"] = runs
+    results["summary"] = summarize(runs)
+    print(json.dumps(results["summary"], indent=2))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
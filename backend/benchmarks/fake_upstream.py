@@ -0,0 +1,149 @@
+"""
+Local stand-ins for DuckDuckGo and the pages it links to.
+
+Both servers run in a background thread with uvicorn so benchmarks never
+touch the internet. Latency, page size and error rate are configurable so
+the same run can model a healthy or a degraded upstream.
+"""
+import asyncio
+import random
+import re
+import socket
+import threading
+import time
+from typing import Dict, Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+
+WORDS = (
+    "research analysis model language system data network learning python web search "
+    "agent reasoning evidence source citation knowledge process result method study"
+).split()
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "topic"
+
+
+async def _delay(latency_ms: float, jitter_ms: float):
+    delay = max(latency_ms + random.uniform(-jitter_ms, jitter_ms), 0.0)
+    if delay:
+        await asyncio.sleep(delay / 1000)
+
+
+def create_search_app(content_base: str, latency_ms: float = 50, jitter_ms: float = 10,
+                      error_rate: float = 0.0, related_topics: int = 5) -> FastAPI:
+    """Fake DuckDuckGo Instant Answer API returning links into the content server"""
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.get("/")
+    async def instant_answer(q: str = "", format: str = "json"):
+        app.state.requests += 1
+        await _delay(latency_ms, jitter_ms)
+        if random.random() < error_rate:
+            return JSONResponse({"error": "upstream unavailable"}, status_code=503)
+
+        slug = _slug(q)
+        return {
+            "Heading": q.title(),
+            "Abstract": f"{q} is a topic covered by several reference pages.",
+            "AbstractURL": f"{content_base}/page/{slug}-0",
+            "RelatedTopics": [
+                {"Text": f"{q} - related article {i}", "FirstURL": f"{content_base}/page/{slug}-{i}"}
+                for i in range(1, related_topics + 1)
+            ],
+        }
+
+    return app
+
+
+def create_content_app(latency_ms: float = 100, jitter_ms: float = 30, page_kb: int = 100,
+                       error_rate: float = 0.0, max_age: int = 0) -> FastAPI:
+    """Fake content host serving deterministic HTML pages of a given size"""
+    app = FastAPI()
+    app.state.requests = 0
+    pages: Dict[str, bytes] = {}
+
+    def render(name: str) -> bytes:
+        if name not in pages:
+            rng = random.Random(name)
+            topic = name.rsplit("-", 1)[0].replace("-", " ")
+            sentences = []
+            size = 0
+            while size < page_kb * 1024:
+                sentence = f"{topic.capitalize()} {' '.join(rng.choices(WORDS, k=12))}."
+                sentences.append(f"<p>{sentence}</p>")
+                size += len(sentence) + 7
+            pages[name] = (
+                f"<html><head><title>{topic.title()}</title><script>var tracking = 1;</script></head>"
+                f"<body><h1>{topic.title()}</h1>{''.join(sentences)}</body></html>"
+            ).encode("utf-8")
+        return pages[name]
+
+    @app.get("/page/{name}")
+    async def page(name: str, request: Request):
+        app.state.requests += 1
+        await _delay(latency_ms, jitter_ms)
+        if random.random() < error_rate:
+            return Response("server error", status_code=500)
+        body = render(name)
+        etag = f'"{len(body)}-{name}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        cache_control = f"max-age={max_age}" if max_age else "no-store"
+        return HTMLResponse(body, headers={"ETag": etag, "Cache-Control": cache_control})
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Run an ASGI app with uvicorn in a daemon thread"""
+
+    def __init__(self, app, port: int = None):
+        self.app = app
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self) -> "BackgroundServer":
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError(f"Server on port {self.port} did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def start_fake_upstreams(options: Dict[str, Any]) -> Dict[str, BackgroundServer]:
+    """Start the content server first so the search server can link to it"""
+    content_port = free_port()
+    content = BackgroundServer(create_content_app(
+        latency_ms=options.get("content_latency_ms", 100),
+        jitter_ms=options.get("content_jitter_ms", 30),
+        page_kb=options.get("page_kb", 100),
+        error_rate=options.get("content_error_rate", 0.0),
+        max_age=options.get("content_max_age", 0),
+    ), port=content_port).start()
+    search = BackgroundServer(create_search_app(
+        content.url,
+        latency_ms=options.get("search_latency_ms", 50),
+        jitter_ms=options.get("search_jitter_ms", 10),
+        error_rate=options.get("search_error_rate", 0.0),
+    )).start()
+    return {"search": search, "content": content}
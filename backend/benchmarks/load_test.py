@@ -0,0 +1,298 @@
+"""
+Load-test harness for the research API and its MCP tools.
+
+Starts local fake DuckDuckGo and content servers, launches the API against
+them (or targets an already running one), then drives /api/ask and the
+tools directly at each concurrency level. Reports throughput, latency
+percentiles and per-phase timings, and writes everything to JSON so runs
+can be compared between releases.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --concurrency 1,8,32 --requests 200
+    python -m benchmarks.load_test --output new.json --baseline old.json
+    python -m benchmarks.load_test --mode api --workers 4 --content-max-age 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from benchmarks.fake_upstream import start_fake_upstreams, free_port
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOPICS = [
+    "python", "machine learning", "neural networks", "databases", "compilers", "operating systems",
+    "cryptography", "distributed systems", "web browsers", "search engines", "graph theory", "robotics",
+]
+TEMPLATES = ["What is {}?", "Explain {}", "How does {} work?", "History of {}", "Why use {}?"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return round(ordered[min(index, len(ordered) - 1)], 2)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    completed = len(latencies)
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": round(sum(latencies) / completed, 2) if completed else 0.0,
+    }
+
+
+def phase_breakdown(trace: List[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    """Total recorded duration_ms per agent; None for answers served from the answer cache
+
+    Concurrent work (parallel fetches, the overlapping pipeline stages) is
+    summed, so an agent's total can exceed the request's wall time. A cache
+    hit prepends a fresh record to the old trace, so its entries say nothing
+    about how long this request's pipeline took.
+    """
+    if any(entry.get("action") == "answer_cache_hit" for entry in trace):
+        return None
+    phases: Dict[str, float] = {}
+    for entry in trace:
+        phases[entry["agent"]] = phases.get(entry["agent"], 0.0) + entry.get("duration_ms", 0.0)
+    return phases
+
+
+def make_questions(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    pool = [template.format(topic) for topic in TOPICS for template in TEMPLATES]
+    rng.shuffle(pool)
+    while len(pool) < count:
+        pool.append(f"{rng.choice(TEMPLATES).format(rng.choice(TOPICS))} #{len(pool)}")
+    return pool[:count]
+
+
+async def drive(concurrency: int, total: int, call) -> Dict[str, Any]:
+    """Run `total` calls with at most `concurrency` in flight"""
+    latencies: List[float] = []
+    errors = 0
+    extras: List[Any] = []
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                extra = await call(i)
+                latencies.append((time.perf_counter() - started) * 1000)
+                extras.append(extra)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    result = summarize(latencies, errors, time.perf_counter() - started)
+    result["concurrency"] = concurrency
+    return result, extras
+
+
+async def bench_api(base_url: str, levels: List[int], total: int, questions: List[str], seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    results = []
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        for level in levels:
+            async def ask(_):
+                response = await client.post("/api/ask", json={"question": rng.choice(questions)})
+                response.raise_for_status()
+                return phase_breakdown(response.json().get("trace", []))
+
+            result, breakdowns = await drive(level, total, ask)
+            phases = [breakdown for breakdown in breakdowns if breakdown is not None]
+            result["answer_cache_hits"] = len(breakdowns) - len(phases)
+            totals: Dict[str, float] = {}
+            for breakdown in phases:
+                for phase, ms in breakdown.items():
+                    totals[phase] = totals.get(phase, 0.0) + ms
+            result["phases_mean_ms"] = {phase: round(ms / len(phases), 2) for phase, ms in totals.items()} if phases else {}
+            result["target"] = "/api/ask"
+            results.append(result)
+            print_row(result)
+    return results
+
+
+async def bench_tools(search_url: str, levels: List[int], total: int, questions: List[str], seed: int) -> List[Dict[str, Any]]:
+    os.environ["DUCKDUCKGO_API_URL"] = search_url
+    sys.path.insert(0, BACKEND_DIR)
+    from app.tools.mcp_tools import web_search_tool, web_fetch_tool
+    from app.tools.http_client import http_client
+
+    web_search_tool.api_url = search_url
+    rng = random.Random(seed)
+    results = []
+    await http_client.start()
+    try:
+        urls = []
+        for question in questions:
+            urls.extend(r["url"] for r in await web_search_tool.search(question, max_results=3))
+
+        for level in levels:
+            web_search_tool.cache.clear()
+            web_fetch_tool.cache.clear()
+
+            async def search(_):
+                await web_search_tool.search(rng.choice(questions), max_results=3)
+
+            async def fetch(_):
+                await web_fetch_tool.fetch(rng.choice(urls), max_chars=5000)
+
+            for name, call in (("web_search", search), ("web_fetch", fetch)):
+                result, _ = await drive(level, total, call)
+                result["target"] = name
+                results.append(result)
+                print_row(result)
+    finally:
+        await http_client.close()
+    return results
+
+
+def print_row(result: Dict[str, Any]):
+    phases = " ".join(f"{k}={v}" for k, v in result.get("phases_mean_ms", {}).items())
+    print(f"{result['target']:<10} c={result['concurrency']:<4} rps={result['throughput_rps']:<8} "
+          f"p50={result['p50_ms']:<8} p95={result['p95_ms']:<8} p99={result['p99_ms']:<8} "
+          f"err={result['errors']:<4} {phases}")
+
+
+def start_api(search_url: str, extra_env: Dict[str, str], workers: int = 1) -> (subprocess.Popen, str):
+    """Launch the API; several workers use the production launcher and a fresh shared cache"""
+    port = free_port()
+    env = dict(os.environ, DUCKDUCKGO_API_URL=search_url, **extra_env)
+    if workers > 1:
+        shared_cache = os.path.join(tempfile.mkdtemp(prefix="bench-"), "shared_cache.sqlite3")
+        env.update(HOST="127.0.0.1", PORT=str(port), SHARED_CACHE_PATH=env.get("SHARED_CACHE_PATH", shared_cache))
+        command = [sys.executable, "main.py", "--production", "--workers", str(workers)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API server did not become healthy")
+
+
+def compare(results: Dict[str, Any], baseline_path: str, tolerance: float) -> bool:
+    """Print p95/throughput deltas against a baseline run; False if anything regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r["target"], r["concurrency"]): r for r in baseline["results"]}
+    ok = True
+    print(f"\nComparison with {baseline_path} (tolerance {tolerance:.0%}):")
+    for r in results["results"]:
+        before = old.get((r["target"], r["concurrency"]))
+        if not before:
+            continue
+        p95_change = (r["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps_change = (r["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] if before["throughput_rps"] else 0.0
+        regressed = p95_change > tolerance or rps_change < -tolerance
+        ok = ok and not regressed
+        print(f"  {'REGRESSION' if regressed else 'ok':<10} {r['target']:<10} c={r['concurrency']:<4} "
+              f"p95 {p95_change:+.1%}  rps {rps_change:+.1%}")
+    return ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per level")
+    parser.add_argument("--questions", type=int, default=40, help="distinct questions in the pool")
+    parser.add_argument("--mode", default="both", choices=("api", "tools", "api,tools", "both"),
+                        metavar="{api,tools,both}", help="api, tools or both (default)")
+    parser.add_argument("--target", help="benchmark an already running API at this URL")
+    parser.add_argument("--search-latency-ms", type=float, default=50)
+    parser.add_argument("--content-latency-ms", type=float, default=100)
+    parser.add_argument("--page-kb", type=int, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="applied to both fake upstreams")
+    parser.add_argument("--content-max-age", type=int, default=0, help="Cache-Control max-age for pages (0 = no-store)")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="keep the answer cache on in the spawned API (off so the pipeline is measured)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the spawned API (production mode)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    questions = make_questions(args.questions, args.seed)
+    options = {
+        "search_latency_ms": args.search_latency_ms,
+        "content_latency_ms": args.content_latency_ms,
+        "page_kb": args.page_kb,
+        "search_error_rate": args.error_rate,
+        "content_error_rate": args.error_rate,
+        "content_max_age": args.content_max_age,
+    }
+    upstreams = start_fake_upstreams(options)
+    search_url = upstreams["search"].url + "/"
+    results: Dict[str, Any] = {
+        "started_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": dict(options, requests=args.requests, questions=args.questions, levels=levels,
+                        workers=args.workers),
+        "results": [],
+    }
+
+    modes = {"api", "tools"} if args.mode == "both" else set(args.mode.split(","))
+    process = None
+    try:
+        if "api" in modes:
+            base_url = args.target
+            if not base_url:
+                extra_env = {} if args.answer_cache else {"ANSWER_CACHE_ENABLED": "false"}
+                process, base_url = start_api(search_url, extra_env, workers=args.workers)
+            print(f"Benchmarking /api/ask at {base_url}")
+            results["results"] += await bench_api(base_url, levels, args.requests, questions, args.seed)
+        if "tools" in modes:
+            print("Benchmarking MCP tools in-process")
+            results["results"] += await bench_tools(search_url, levels, args.requests, questions, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        for server in upstreams.values():
+            server.stop()
+
+    results["upstream_requests"] = {name: server.app.state.requests for name, server in upstreams.items()}
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        return 0 if compare(results, args.baseline, args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,18 +1,78 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+# Cold-start reference point, before any heavy import
+STARTED_AT = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Literal
+from contextlib import asynccontextmanager
 import os
+import json
 from dotenv import load_dotenv
-from app.services.orchestrator import orchestrator
 
 # Load environment variables
 load_dotenv()
 
+from app.services.orchestrator import orchestrator
+from app.services.admission import OverloadedError
+from app.tools.cache import BatchMemo, normalize_query
+from app.tools.http_client import http_client
+from app.tools.mcp_tools import web_search_tool, web_fetch_tool
+from app.tools.html_extract import html_extractor
+from app.tools.passage_index import passage_index
+from app.tools.dedup import content_dedup
+from app.tools.shared_store import shared_store
+from app.agents.topics import topic_matcher
+from app.metrics import metrics, REQUESTS_TOTAL, REQUEST_DURATION
+from app.tracing import TraceRecord, resolve_level, render_trace, render_entry
+from app.startup import StartupReport
+from app import encoding
+
+startup = StartupReport(STARTED_AT)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared HTTP connection pool lives for the whole server process
+    await http_client.start()
+    await orchestrator.trace_store.start()
+    # BeautifulSoup is only needed when pages are parsed whole instead of streamed
+    modules = [] if web_fetch_tool.streaming or html_extractor.mode == "process" else ["bs4"]
+    if modules and html_extractor.parser == "lxml":
+        modules.append("lxml")
+    await startup.warm_up(http_client, [web_search_tool.api_url], modules)
+    startup.ready()
+    yield
+    await orchestrator.trace_store.close()
+    await http_client.close()
+    html_extractor.shutdown()
+    shared_store.close()
+
+# Component stats exported on /metrics (gauges, or counters for *_total fields)
+metrics.register_stats("http_pool", http_client.stats)
+metrics.register_stats("circuit_breakers", http_client.breakers.summary)
+metrics.register_stats("fetch", web_fetch_tool.stats)
+metrics.register_stats("fetch_cache", web_fetch_tool.cache.stats)
+metrics.register_stats("search", web_search_tool.stats)
+metrics.register_stats("search_cache", web_search_tool.cache.stats)
+metrics.register_stats("search_singleflight", web_search_tool.inflight.stats)
+metrics.register_stats("fetch_singleflight", web_fetch_tool.inflight.stats)
+metrics.register_stats("answer_cache", orchestrator.answer_cache.stats)
+metrics.register_stats("admission", orchestrator.admission.stats)
+metrics.register_stats("passage_index", passage_index.stats)
+metrics.register_stats("content_dedup", content_dedup.stats)
+metrics.register_stats("topics", topic_matcher.stats)
+metrics.register_stats("trace_store", orchestrator.trace_store.stats)
+metrics.register_stats("startup", startup.stats)
+metrics.register_stats("shared_cache", shared_store.stats)
+
 app = FastAPI(
     title="Research & Reason Assistant API",
     description="Intelligent research assistant with multi-agent reasoning",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -24,8 +84,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "reason": exc.reason, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Streaming responses are timed until their headers are sent
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, never the raw path, so scans and path
+        # parameters cannot create unbounded series
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", None) or "unmatched"
+        REQUESTS_TOTAL.inc(endpoint=endpoint, status=status)
+        REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=endpoint)
+
+Priority = Literal["high", "normal", "low"]
+# none drops the trace, summary keeps agent/action/status/duration per step
+TraceLevel = Literal["none", "summary", "full"]
+# Top-level keys a client can ask for; unset returns all of them
+ResponseField = Literal["answer", "reasoning", "citations", "trace", "partial", "request_id"]
+
 class QueryRequest(BaseModel):
     question: str
+    priority: Priority = "normal"
+    # End-to-end budget; past it a partial answer is returned (server default if unset)
+    deadline_ms: Optional[float] = Field(None, gt=0)
+    trace_level: Optional[TraceLevel] = None
+    fields: Optional[List[ResponseField]] = None
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+    stream: bool = False
+    max_concurrency: Optional[int] = None
+    priority: Priority = "low"
+    deadline_ms: Optional[float] = Field(None, gt=0)
+    trace_level: Optional[TraceLevel] = None
+    fields: Optional[List[ResponseField]] = None
+
+# Largest batch accepted by /api/ask/batch
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", 100))
 
 class Citation(BaseModel):
     url: str
@@ -40,12 +150,14 @@ class TraceEntry(BaseModel):
     input: Dict[str, Any]
     output: Dict[str, Any]
     status: str
+    duration_ms: float = 0.0
 
 class ResearchResponse(BaseModel):
     answer: str
     reasoning: str
     citations: List[Citation]
     trace: List[TraceEntry]
+    partial: bool = False
 
 @app.get("/")
 async def root():
@@ -61,11 +173,58 @@ async def health_check():
     return {
         "status": "healthy",
         "agents": "operational",
-        "tools": "mcp_active"
+        "tools": "mcp_active",
+        "http_pool": http_client.stats(),
+        "circuit_breakers": http_client.breakers.stats(),
+        "fetch": web_fetch_tool.stats(),
+        "fetch_cache": dict(web_fetch_tool.cache.stats(), **web_fetch_tool.inflight.stats()),
+        "search": web_search_tool.stats(),
+        "search_cache": dict(web_search_tool.cache.stats(), **web_search_tool.inflight.stats()),
+        "html_extractor": html_extractor.stats(),
+        "answer_cache": orchestrator.answer_cache.stats(),
+        "admission": orchestrator.admission.stats(),
+        "passage_index": passage_index.stats(),
+        "content_dedup": content_dedup.stats(),
+        "topics": topic_matcher.stats(),
+        "trace_store": orchestrator.trace_store.stats(),
+        "startup": startup.stats(),
+        "shared_cache": shared_store.stats(),
+        "response_encoding": encoding.stats(),
+        "worker_pid": os.getpid()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus text exposition of latency histograms, counters and cache stats"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def present(result: Dict[str, Any], level: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Response body with the requested fields and the trace serialized at the requested verbosity"""
+    if "error" in result:
+        # Batch items that were shed or ran out of time carry no answer
+        return dict(result)
+    if fields is None:
+        return dict(result, trace=render_trace(result.get("trace", []), level))
+    body = {field: result[field] for field in fields if field in result and field != "trace"}
+    if "trace" in fields:
+        body["trace"] = render_trace(result.get("trace", []), level)
+    return body
+
+def stream_level(request: QueryRequest) -> str:
+    """Trace level for streamed events; leaving trace out of fields sends no trace events"""
+    if request.fields is not None and "trace" not in request.fields:
+        return "none"
+    return resolve_level(request.trace_level)
+
+def sse(event: str, data: Any, level: str) -> str:
+    if isinstance(data, TraceRecord):
+        data = render_entry(data, level)
+        if data is None:
+            return ""
+    return f"event: {event}\ndata: {encoding.dumps_str(data)}\n\n"
+
 @app.post("/api/ask")
-async def ask_question(request: QueryRequest):
+async def ask_question(request: QueryRequest, http_request: Request):
     """
     Main endpoint for processing research questions with CrewAI agents
     """
@@ -74,18 +233,164 @@ async def ask_question(request: QueryRequest):
             raise HTTPException(status_code=400, detail="Question cannot be empty")
         
         # Process with CrewAI agents
-        result = await orchestrator.process_query(request.question)
+        result = await orchestrator.process_query(
+            request.question, priority=request.priority, deadline_ms=request.deadline_ms
+        )
         
-        return result
+        body = present(result, resolve_level(request.trace_level), request.fields)
+        return await encoding.json_response(body, http_request.headers.get("accept-encoding"))
     
+    except OverloadedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+@app.post("/api/ask/stream")
+async def ask_question_stream(request: QueryRequest):
+    """
+    Server-Sent Events variant of /api/ask: streams trace entries as agents
+    produce them, then citations, then the final answer
+    """
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    # Wait for the first event so overload is reported as a 429/503 status
+    events = orchestrator.stream_query(request.question, priority=request.priority, deadline_ms=request.deadline_ms)
+    first = await events.__anext__()
+    level = stream_level(request)
+
+    async def event_stream():
+        try:
+            yield sse(*first, level)
+            async for event, data in events:
+                yield sse(event, data, level)
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': f'Processing error: {str(e)}'})}\n\n"
+        finally:
+            # Releases the admission slot even if the client disconnected
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/ask/batch")
+async def ask_question_batch(request: BatchQueryRequest, http_request: Request):
+    """
+    Answer several questions concurrently, sharing search and fetch work
+    across the batch. Results come back in request order, or as Server-Sent
+    Events in completion order when stream is set
+    """
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="Questions cannot be empty")
+    if any(not question.strip() for question in request.questions):
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    if len(request.questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_QUESTIONS} questions per batch")
+
+    memo = BatchMemo()
+    level = resolve_level(request.trace_level)
+    started = time.perf_counter()
+    batch = orchestrator.process_batch(
+        request.questions, memo, concurrency=request.max_concurrency,
+        priority=request.priority, deadline_ms=request.deadline_ms
+    )
+
+    failed = {"overloaded": 0, "deadline_exceeded": 0}
+
+    def count(result: Dict[str, Any]):
+        if result.get("error") in failed:
+            failed[result["error"]] += 1
+
+    def summary() -> Dict[str, Any]:
+        return dict(
+            questions=len(request.questions),
+            overloaded=failed["overloaded"],
+            deadline_exceeded=failed["deadline_exceeded"],
+            unique_questions=len({normalize_query(question) for question in request.questions}),
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+            **memo.stats()
+        )
+
+    if request.stream:
+        async def event_stream():
+            try:
+                async for index, result in batch:
+                    count(result)
+                    data = dict(present(result, level, request.fields), index=index, question=request.questions[index])
+                    yield sse("result", data, level)
+                yield f"event: done\ndata: {json.dumps(summary())}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'detail': f'Processing error: {str(e)}'})}\n\n"
+            finally:
+                await batch.aclose()
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    try:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(request.questions)
+        async for index, result in batch:
+            count(result)
+            results[index] = present(result, level, request.fields)
+        body = {"results": results, "batch": summary()}
+        return await encoding.json_response(body, http_request.headers.get("accept-encoding"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
+@app.get("/api/traces")
+async def query_traces(request_id: Optional[str] = None, question: Optional[str] = None,
+                       agent: Optional[str] = None, status: Optional[str] = None,
+                       partial: Optional[bool] = None, limit: int = 50):
+    """
+    Search full traces recorded in the trace store, newest first
+    """
+    store = orchestrator.trace_store
+    if not store.enabled:
+        raise HTTPException(status_code=404, detail="Trace store is disabled (set TRACE_STORE_PATH)")
+    traces = await store.query(
+        request_id=request_id, question=question, agent=agent,
+        status=status, partial=partial, limit=max(1, min(limit, 500))
+    )
+    return {"traces": traces, "count": len(traces)}
+
+startup.imported()
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host=os.getenv("HOST", "127.0.0.1"),
-        port=int(os.getenv("PORT", 8000)),
-        reload=True
-    )
+
+    parser = argparse.ArgumentParser(description="Run the Research & Reason Assistant API")
+    parser.add_argument("--production", action="store_true", default=os.getenv("SERVER_MODE") == "production",
+                        help="several worker processes, no reloader (or set SERVER_MODE=production)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 0)),
+                        help="worker processes in production mode (default: one per CPU core)")
+    args = parser.parse_args()
+
+    host = os.getenv("HOST", "127.0.0.1")
+    port = int(os.getenv("PORT", 8000))
+    if not args.production:
+        uvicorn.run("main:app", host=host, port=port, reload=True)
+    else:
+        workers = args.workers or os.cpu_count() or 1
+        if workers > 1:
+            # Workers inherit the environment, so they all open the same store
+            os.environ.setdefault("SHARED_CACHE_PATH", os.path.join("data", "shared_cache.sqlite3"))
+        print(f"🏭 Production mode: {workers} workers on {host}:{port}, "
+              f"shared cache {os.getenv('SHARED_CACHE_PATH') or 'disabled'}")
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            reload=False,
+            # Stop accepting on SIGTERM, then give in-flight requests this long to finish
+            timeout_graceful_shutdown=float(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", 30)),
+            timeout_keep_alive=int(os.getenv("KEEP_ALIVE_TIMEOUT", 5)),
+            access_log=os.getenv("ACCESS_LOG", "false").lower() in ("1", "true", "yes")
+        )
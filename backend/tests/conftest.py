@@ -0,0 +1,82 @@
+import asyncio
+import random
+import re
+
+import httpx
+import pytest
+
+from app.tools.cache import FetchCache, SingleFlight, TTLCache
+from app.tools.circuit_breaker import CircuitBreakerRegistry
+from app.tools.http_client import http_client
+from app.tools.mcp_tools import web_fetch_tool, web_search_tool
+
+WORDS = (
+    "tide moon ocean gravity orbit planet energy wave current coast water earth sun cycle "
+    "force pull motion basin shore depth season climate reef harbor"
+).split()
+
+
+class FakeWeb:
+    """In-process search API (search.test) and page host (pages.test) behind the shared HTTP client"""
+
+    def __init__(self):
+        self.search_delay = 0.0
+        self.page_delay = 0.0
+        self.page_status = 200
+        self.page_headers = {}
+        self.requests = []
+
+    def page(self, path: str) -> str:
+        words = random.Random(path).choices(WORDS, k=200)
+        return f"<html><head><title>{path}</title></head><body><p>{path} {' '.join(words)}.</p></body></html>"
+
+    @staticmethod
+    async def wait(request: httpx.Request, delay: float):
+        # MockTransport ignores timeouts, so enforce the read timeout here
+        timeout = request.extensions.get("timeout", {}).get("read")
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise httpx.ReadTimeout("Read timed out", request=request)
+        await asyncio.sleep(delay)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(str(request.url))
+        if request.url.host == "search.test":
+            await self.wait(request, self.search_delay)
+            query = request.url.params["q"]
+            slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")
+            return httpx.Response(200, json={
+                "Heading": query,
+                "Abstract": f"{query} is covered by several pages.",
+                "AbstractURL": f"http://pages.test/{slug}-0",
+                "RelatedTopics": [
+                    {"Text": f"{query} article {i}", "FirstURL": f"http://pages.test/{slug}-{i}"} for i in (1, 2)
+                ],
+            })
+        await self.wait(request, self.page_delay)
+        etag = self.page_headers.get("etag")
+        if etag is not None and request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers=self.page_headers)
+        body = self.page(request.url.path).encode("utf-8")
+        headers = dict(self.page_headers, **{"content-type": "text/html", "content-length": str(len(body))})
+        return httpx.Response(self.page_status, content=self.chunks(body), headers=headers)
+
+    @staticmethod
+    async def chunks(body: bytes, size: int = 256):
+        # Streamed in pieces, so readers that stop early leave bytes undownloaded
+        for start in range(0, len(body), size):
+            yield body[start:start + size]
+
+
+@pytest.fixture
+def fake_web(monkeypatch):
+    """Route web_search_tool and web_fetch_tool to a FakeWeb with empty caches and breakers"""
+    web = FakeWeb()
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(web.handle)))
+    monkeypatch.setattr(http_client, "breakers", CircuitBreakerRegistry())
+    monkeypatch.setattr(web_search_tool, "api_url", "http://search.test/")
+    monkeypatch.setattr(web_search_tool, "cache", TTLCache())
+    monkeypatch.setattr(web_search_tool, "inflight", SingleFlight())
+    monkeypatch.setattr(web_fetch_tool, "cache", FetchCache(disk_dir=None))
+    monkeypatch.setattr(web_fetch_tool, "inflight", SingleFlight())
+    return web
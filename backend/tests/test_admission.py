@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, OverloadedError
+
+
+def controller(**kwargs) -> AdmissionController:
+    admission = AdmissionController(**kwargs)
+    admission.enabled = True
+    return admission
+
+
+def test_requests_beyond_the_queue_are_shed_with_429():
+    async def run():
+        admission = controller(max_concurrent=1, max_queue=1, queue_timeout=1)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError) as shed:
+            await admission.acquire()
+        assert shed.value.status_code == 429 and shed.value.retry_after >= 1
+        admission.release()
+        await waiter
+        assert admission.stats()["active"] == 1 and admission.stats()["queue_depth"] == 0
+        admission.release()
+        assert admission.stats()["active"] == 0
+
+    asyncio.run(run())
+
+
+def test_waiters_past_their_queue_deadline_get_503():
+    async def run():
+        admission = controller(max_concurrent=1, max_queue=4)
+        await admission.acquire()
+        with pytest.raises(OverloadedError) as shed:
+            await admission.acquire(timeout=0.01)
+        assert shed.value.status_code == 503
+        assert admission.stats()["queue_depth"] == 0
+        assert admission.shed == {"queue_full": 0, "queue_timeout": 1}
+
+    asyncio.run(run())
+
+
+def test_freed_slots_go_to_higher_priority_waiters_first():
+    async def run():
+        admission = controller(max_concurrent=1, max_queue=8)
+        await admission.acquire()
+        order = []
+
+        async def wait(priority):
+            await admission.acquire(priority)
+            order.append(priority)
+            admission.release()
+
+        tasks = [asyncio.create_task(wait(p)) for p in ("low", "normal", "high")]
+        await asyncio.sleep(0)
+        admission.release()
+        await asyncio.gather(*tasks)
+        assert order == ["high", "normal", "low"]
+
+    asyncio.run(run())
+
+
+def test_low_priority_lane_only_uses_part_of_the_queue():
+    async def run():
+        admission = controller(max_concurrent=1, max_queue=2, low_priority_share=0.5)
+        await admission.acquire()
+        queued = [asyncio.create_task(admission.acquire("low"))]
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError):
+            await admission.acquire("low")
+        queued.append(asyncio.create_task(admission.acquire("normal")))
+        await asyncio.sleep(0)
+        assert admission.stats()["queue_depth"] == 2
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        assert admission.stats()["queue_depth"] == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        admission = controller(max_concurrent=1, max_queue=4)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        admission.release()
+        assert admission.stats()["active"] == 0
+        async with admission.slot():
+            assert admission.stats()["active"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from app.services.answer_cache import AnswerCache, MinHasher, anchors
+from app.services.orchestrator import orchestrator
+from app.tools.circuit_breaker import CircuitBreakerRegistry
+from app.tools.http_client import http_client
+
+
+def result(answer: str):
+    return {"answer": answer, "reasoning": "", "citations": [{"url": "https://example.com"}], "trace": []}
+
+
+def cache(**kwargs) -> AnswerCache:
+    answer_cache = AnswerCache(max_entries=10, ttl=60, **kwargs)
+    answer_cache.enabled = True
+    return answer_cache
+
+
+def test_exact_hits_ignore_case_whitespace_and_trailing_punctuation():
+    answer_cache = cache()
+    answer_cache.set("What is Python?", result("python"))
+    hit = answer_cache.get("  what is   python ")
+    assert hit["answer"] == "python"
+    assert hit["trace"][0].output["match"] == "exact"
+
+
+def test_symbols_keep_questions_apart():
+    answer_cache = cache(near_match=True)
+    answer_cache.set("What is C#?", result("c sharp"))
+    assert answer_cache.get("What is C++?") is None
+    assert answer_cache.get("what is c") is None
+
+
+def test_near_matches_are_off_by_default():
+    answer_cache = cache()
+    answer_cache.set("How do I reverse a list in Python quickly?", result("reversed"))
+    assert answer_cache.get("How do I reverse a list in Python quickly") is not None
+    assert answer_cache.get("How can I reverse a list in Python quickly?") is None
+
+
+def test_near_matches_need_same_entities_and_numbers():
+    answer_cache = cache(near_match=True)
+    answer_cache.set("What is the population of Austria?", result("austria"))
+    answer_cache.set("How many calories in an apple?", result("apple"))
+    answer_cache.set("Who won the World Cup in 2018?", result("2018"))
+    assert answer_cache.get("What is the population of Australia?") is None
+    assert answer_cache.get("How many calories in an apple pie?") is None
+    assert answer_cache.get("Who won the World Cup in 2022?") is None
+
+
+def test_near_match_accepts_close_paraphrase():
+    answer_cache = cache(near_match=True, threshold=0.6)
+    answer_cache.set("What is the current population of Austria in total?", result("austria"))
+    hit = answer_cache.get("What is the current population of Austria, in total, today?")
+    assert hit is not None and hit["trace"][0].output["match"] == "near_duplicate"
+
+
+def test_anchors_are_numbers_and_capitalized_words():
+    assert anchors("What is the population of Austria in 2024?") == {"austria", "2024"}
+    assert anchors("Python release date") == frozenset()
+
+
+def test_similarity_of_identical_text_is_one():
+    hasher = MinHasher()
+    assert MinHasher.similarity(hasher.signature("a b c"), hasher.signature("a b c")) == 1.0
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    answer_cache = cache()
+    answer_cache.set("What is Python?", result("python"))
+    stored = time.time()
+    monkeypatch.setattr("app.services.answer_cache.time.time", lambda: stored + 61)
+    assert answer_cache.get("What is Python?") is None
+
+
+def test_answers_built_from_demo_content_are_not_cached(fake_web, monkeypatch):
+    monkeypatch.setattr(orchestrator, "answer_cache", cache())
+    fake_web.page_status = 503
+    asyncio.run(orchestrator.process_query("How deep is the ocean?", deadline_ms=0))
+    assert orchestrator.answer_cache.get("How deep is the ocean?") is None
+
+    # The failures opened the circuit for the page host; start the host afresh
+    fake_web.page_status = 200
+    monkeypatch.setattr(http_client, "breakers", CircuitBreakerRegistry())
+    asyncio.run(orchestrator.process_query("How deep is the ocean?", deadline_ms=0))
+    assert orchestrator.answer_cache.get("How deep is the ocean?") is not None
@@ -0,0 +1,86 @@
+import asyncio
+import importlib
+import time
+
+from fastapi.testclient import TestClient
+
+from app.services.admission import AdmissionController
+from app.services.orchestrator import orchestrator
+from app.tools.cache import BatchMemo
+from main import app
+
+orchestrator_module = importlib.import_module("app.services.orchestrator")
+
+
+def answer_slowly(monkeypatch):
+    async def process(question, context=None, deadline=None):
+        await asyncio.sleep(0.05)
+        return {"answer": f"About {question}", "reasoning": "", "citations": [], "trace": []}
+
+    monkeypatch.setattr(orchestrator, "_process_with_agents", process)
+    monkeypatch.setattr(orchestrator, "agents_available", True)
+    monkeypatch.setattr(orchestrator.answer_cache, "enabled", False)
+    # One slot and no queue: the second concurrent question is shed
+    monkeypatch.setattr(orchestrator, "admission", AdmissionController(max_concurrent=1, max_queue=0))
+
+
+def test_shed_batch_items_are_reported_as_errors(monkeypatch):
+    answer_slowly(monkeypatch)
+
+    async def run():
+        return dict([item async for item in orchestrator.process_batch(["first", "second"], BatchMemo(), concurrency=2)])
+
+    results = asyncio.run(run())
+    errors = [result for result in results.values() if "error" in result]
+    answers = [result for result in results.values() if "answer" in result]
+    assert len(errors) == 1 and len(answers) == 1
+    assert errors[0]["error"] == "overloaded"
+    assert errors[0]["retry_after"] >= 1
+
+
+def test_batch_endpoint_counts_overloaded_items(monkeypatch):
+    answer_slowly(monkeypatch)
+    response = TestClient(app).post("/api/ask/batch", json={
+        "questions": ["first", "second"], "max_concurrency": 2, "fields": ["answer"],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["batch"]["overloaded"] == 1
+    assert sorted(sorted(result) for result in body["results"]) == [["answer"], ["detail", "error", "retry_after", "status_code"]]
+
+
+def test_batch_deadline_stops_questions_that_run_out_of_time(monkeypatch):
+    async def process(question, context=None, deadline=None):
+        await asyncio.sleep(0.2)  # ignores the deadline
+        return {"answer": f"About {question}", "reasoning": "", "citations": [], "trace": []}
+
+    monkeypatch.setattr(orchestrator, "_process_with_agents", process)
+    monkeypatch.setattr(orchestrator, "agents_available", True)
+    monkeypatch.setattr(orchestrator.answer_cache, "enabled", False)
+    monkeypatch.setattr(orchestrator_module, "BATCH_DEADLINE_GRACE_MS", 0)
+
+    async def run():
+        batch = orchestrator.process_batch(["first", "second", "third"], BatchMemo(), concurrency=1, deadline_ms=300)
+        return dict([item async for item in batch])
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    assert time.perf_counter() - started < 0.45
+    assert results[0]["answer"] == "About first"
+    assert results[1]["error"] == results[2]["error"] == "deadline_exceeded"
+
+
+def test_duplicate_questions_share_one_computation(fake_web, monkeypatch):
+    monkeypatch.setattr(orchestrator.answer_cache, "enabled", False)
+    memo = BatchMemo()
+
+    async def run():
+        batch = orchestrator.process_batch(["What is a tide?", "what is a tide", "What is a reef?"], memo, deadline_ms=0)
+        return dict([item async for item in batch])
+
+    results = asyncio.run(run())
+    assert results[0] is results[1]
+    searches = [url for url in fake_web.requests if "search.test" in url]
+    assert len(searches) == 2
+    # One memo entry per distinct search and page, none of them computed twice
+    assert memo.stats()["shared_calls"] == 2 + len(fake_web.requests) - len(searches)
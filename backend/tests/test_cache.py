@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+
+from app.tools.cache import FetchCache, normalize_query, TTLCache
+from app.tools.shared_store import shared_store
+
+
+def test_normalize_query_folds_case_whitespace_and_trailing_punctuation():
+    assert normalize_query("  What is   Python?? ") == "what is python"
+    assert normalize_query("WHAT IS PYTHON") == normalize_query("what is python.")
+
+
+def test_normalize_query_keeps_symbols_inside_tokens():
+    keys = {normalize_query(q) for q in ("What is C++?", "What is C#?", "what is c", "What is C?")}
+    assert keys == {"what is c++", "what is c#", "what is c"}
+    assert normalize_query("Is node.js fast?") == "is node.js fast"
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.tools.cache.time.time", lambda: now[0])
+    cache = TTLCache(max_entries=2, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now[0] += 11
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_fetch_cache_counts_a_miss_only_when_every_tier_misses(monkeypatch):
+    async def shared_get(namespace, key):
+        return {"result": {"url": "https://a.example"}, "expires_at": time.time() + 60} if key == "shared" else None
+
+    monkeypatch.setattr(shared_store, "get", shared_get)
+    cache = FetchCache(default_ttl=60, disk_dir=None)
+    assert asyncio.run(cache.alookup("shared")) is not None
+    assert asyncio.run(cache.alookup("missing")) is None
+    stats = cache.stats()
+    assert (stats["shared_hits"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_fetch_cache_disk_tier_evicts_least_recently_used_files(tmp_path):
+    cache = FetchCache(default_ttl=60, disk_dir=str(tmp_path), disk_max_entries=3)
+    for n in range(3):
+        cache.store(f"page{n}", {"url": f"https://{n}.example", "content": "x" * 100}, {})
+        time.sleep(0.01)
+    cache.memory.clear()
+    assert cache.lookup("page0") is not None  # now the most recently used
+    time.sleep(0.01)
+    cache.store("page3", {"url": "https://3.example", "content": "x" * 100}, {})
+    cache.memory.clear()
+    assert len(os.listdir(tmp_path)) == 3
+    assert cache.lookup("page1") is None
+    assert cache.lookup("page0") is not None and cache.lookup("page3") is not None
+
+
+def test_fetch_cache_disk_tier_is_bounded_in_bytes(tmp_path):
+    cache = FetchCache(default_ttl=60, disk_dir=str(tmp_path), disk_max_bytes=2000)
+    for n in range(10):
+        cache.store(f"page{n}", {"url": f"https://{n}.example", "content": "x" * 500}, {})
+    assert sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)) <= 2000
+    assert cache.stats()["disk_evictions"] > 0
+    # A new process picks up what is already on disk
+    assert FetchCache(disk_dir=str(tmp_path), disk_max_bytes=2000).stats()["disk_entries"] == len(os.listdir(tmp_path))
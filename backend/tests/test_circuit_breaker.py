@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.tools import circuit_breaker
+from app.tools.circuit_breaker import CircuitOpenError, HostBreaker
+from app.tools.http_client import SharedHTTPClient
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def breaker(**overrides) -> HostBreaker:
+    config = dict(window=10, min_requests=4, failure_rate=0.5, open_seconds=30, half_open_probes=1,
+                  latency_samples=4, percentile=99, multiplier=3, min_timeout=1.0, adaptive=True)
+    config.update(overrides)
+    return HostBreaker("example.com", **config)
+
+
+def fail(host_breaker: HostBreaker, times: int):
+    for _ in range(times):
+        host_breaker.before_request()
+        host_breaker.after_request(False, 0.1)
+
+
+def test_opens_once_the_failure_rate_is_reached(clock):
+    host_breaker = breaker()
+    fail(host_breaker, 3)
+    assert host_breaker.state == "closed"  # fewer than min_requests outcomes
+    fail(host_breaker, 1)
+    assert host_breaker.state == "open" and host_breaker.trips == 1
+    with pytest.raises(CircuitOpenError):
+        host_breaker.before_request()
+    assert host_breaker.rejected == 1
+
+
+def test_half_open_probe_success_closes(clock):
+    host_breaker = breaker()
+    fail(host_breaker, 4)
+    clock[0] += 31
+    host_breaker.before_request()
+    assert host_breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        host_breaker.before_request()  # only one probe at a time
+    host_breaker.after_request(True, 0.1)
+    assert host_breaker.state == "closed"
+    host_breaker.before_request()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    host_breaker = breaker()
+    fail(host_breaker, 4)
+    clock[0] += 31
+    fail(host_breaker, 1)
+    assert host_breaker.state == "open" and host_breaker.trips == 2
+
+
+def test_abandoned_requests_do_not_count(clock):
+    host_breaker = breaker()
+    for _ in range(10):
+        host_breaker.before_request()
+        host_breaker.after_request(None, 5.0)
+    assert host_breaker.state == "closed" and host_breaker.stats()["window"] == 0
+
+
+def test_adaptive_timeout_follows_observed_latency(clock):
+    host_breaker = breaker()
+    assert host_breaker.timeout(10.0) == 10.0  # not enough samples yet
+    for latency in (0.5, 0.6, 0.7, 0.8):
+        host_breaker.after_request(True, latency)
+    assert host_breaker.timeout(10.0) == pytest.approx(2.4)
+    assert host_breaker.timeout(1.5) == 1.5
+
+
+def test_timeouts_cut_short_by_the_callers_budget_do_not_count(clock):
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client = SharedHTTPClient(default_timeout=5.0)
+
+    async def run(budget):
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        for _ in range(5):
+            with pytest.raises(httpx.ReadTimeout):
+                await client.get("http://slow.test/", budget=budget)
+        await client.close()
+
+    asyncio.run(run(0.4))
+    assert client.breakers.get("slow.test").state == "closed"
+    asyncio.run(run(None))
+    assert client.breakers.get("slow.test").state == "open"
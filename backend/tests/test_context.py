@@ -0,0 +1,28 @@
+import asyncio
+import importlib
+import json
+
+research_agents = importlib.import_module("app.agents.research_agents").research_agents
+
+NAMES = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+
+
+def test_concurrent_requests_keep_separate_traces(fake_web):
+    fake_web.search_delay = 0.02
+    fake_web.page_delay = 0.02
+
+    async def run():
+        return await asyncio.gather(*[
+            research_agents.process_question(f"Where does the {name} current flow?") for name in NAMES
+        ])
+
+    results = asyncio.run(run())
+    assert len({result["request_id"] for result in results}) == len(NAMES)
+    for name, result in zip(NAMES, results):
+        others = [other for other in NAMES if other != name]
+        for record in result["trace"]:
+            text = json.dumps([record.input, record.output], default=str)
+            assert not any(other in text for other in others), (name, record.to_dict())
+        assert any(record.action == "web_search" and name in record.input["query"] for record in result["trace"])
+        assert all(name in citation["url"] for citation in result["citations"])
+
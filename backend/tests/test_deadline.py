@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+from app.services.orchestrator import orchestrator
+from app.tools.mcp_tools import web_fetch_tool, web_search_tool
+
+
+def test_small_deadline_returns_a_partial_answer_on_time(fake_web, monkeypatch):
+    monkeypatch.setattr(orchestrator.answer_cache, "enabled", False)
+    fake_web.page_delay = 2.0
+
+    started = time.perf_counter()
+    result = asyncio.run(orchestrator.process_query("How do ocean tides work?", deadline_ms=300))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.3 + 0.25
+    assert result["partial"] is True
+    assert any(record.action == "deadline_exceeded" for record in result["trace"])
+
+
+def test_a_concurrent_request_with_a_larger_budget_is_unaffected(fake_web, monkeypatch):
+    monkeypatch.setattr(orchestrator.answer_cache, "enabled", False)
+    fake_web.page_delay = 0.3
+    question = "Why does the moon pull the ocean?"
+
+    async def run():
+        impatient = asyncio.ensure_future(orchestrator.process_query(question, deadline_ms=150))
+        await asyncio.sleep(0.01)
+        patient = await orchestrator.process_query(question, deadline_ms=5000)
+        return await impatient, patient
+
+    impatient, patient = asyncio.run(run())
+    assert impatient["partial"] is True
+    assert not patient.get("partial")
+    statuses = [record.output["fetch_status"] for record in patient["trace"] if "fetch_status" in record.output]
+    assert statuses and set(statuses) == {"success"}
+
+
+def test_a_short_budget_does_not_cut_short_a_coalesced_search(fake_web):
+    fake_web.search_delay = 0.3
+
+    async def run():
+        # The impatient caller starts the shared search
+        impatient = asyncio.ensure_future(web_search_tool.search("moon gravity", timeout=0.05))
+        await asyncio.sleep(0.01)
+        patient = await web_search_tool.search("moon gravity", timeout=None)
+        return await impatient, patient
+
+    impatient, patient = asyncio.run(run())
+    assert impatient[0]["source"] == "Demo Wikipedia"
+    assert patient[0]["source"] == "DuckDuckGo Abstract"
+    assert len([url for url in fake_web.requests if "search.test" in url]) == 1
+
+
+def test_a_short_budget_does_not_cut_short_a_coalesced_fetch(fake_web):
+    fake_web.page_delay = 0.3
+
+    async def run():
+        impatient = asyncio.ensure_future(web_fetch_tool.fetch("http://pages.test/coalesced", timeout=0.05))
+        await asyncio.sleep(0.01)
+        patient = await web_fetch_tool.fetch("http://pages.test/coalesced", timeout=5.0)
+        return await impatient, patient
+
+    impatient, patient = asyncio.run(run())
+    assert impatient["status"] == "demo"
+    assert patient["status"] == "success"
+    assert fake_web.requests == ["http://pages.test/coalesced"]
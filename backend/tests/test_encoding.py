@@ -0,0 +1,62 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from app import encoding
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    # negotiate() only needs to know br is available; nothing is compressed
+    monkeypatch.setattr(encoding, "BROTLI_AVAILABLE", True)
+
+
+def test_br_is_preferred_when_rated_equally(with_brotli):
+    assert encoding.negotiate("gzip, deflate, br") == "br"
+    assert encoding.negotiate("*") == "br"
+
+
+def test_gzip_without_brotli(monkeypatch):
+    monkeypatch.setattr(encoding, "BROTLI_AVAILABLE", False)
+    assert encoding.negotiate("gzip, deflate, br") == "gzip"
+    assert encoding.negotiate("br") is None
+
+
+def test_q_values_decide(with_brotli):
+    assert encoding.negotiate("br;q=0.5, gzip;q=0.8") == "gzip"
+    assert encoding.negotiate("gzip;q=0.2, br") == "br"
+    assert encoding.negotiate("gzip; q=0.9, br;q=bogus") == "gzip"
+
+
+def test_q_zero_refuses_a_coding(with_brotli):
+    assert encoding.negotiate("br;q=0, gzip") == "gzip"
+    assert encoding.negotiate("br;q=0, *") == "gzip"
+    assert encoding.negotiate("gzip;q=0") is None
+    assert encoding.negotiate("*;q=0") is None
+
+
+def test_identity_and_missing_header_mean_no_compression(with_brotli, monkeypatch):
+    assert encoding.negotiate("identity") is None
+    assert encoding.negotiate("") is None
+    assert encoding.negotiate(None) is None
+    monkeypatch.setattr(encoding, "COMPRESSION_ENABLED", False)
+    assert encoding.negotiate("gzip") is None
+
+
+def test_small_bodies_are_sent_uncompressed(monkeypatch):
+    monkeypatch.setattr(encoding, "COMPRESSION_MIN_BYTES", 1024)
+    response = asyncio.run(encoding.json_response({"answer": "short"}, "gzip"))
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert json.loads(response.body) == {"answer": "short"}
+
+
+def test_large_bodies_are_compressed_with_the_negotiated_coding(monkeypatch):
+    monkeypatch.setattr(encoding, "BROTLI_AVAILABLE", False)
+    data = {"answer": "long " * 1000}
+    response = asyncio.run(encoding.json_response(data, "br;q=0.9, gzip;q=0.5"))
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.body)) == data
+    assert "content-encoding" not in asyncio.run(encoding.json_response(data, "identity")).headers
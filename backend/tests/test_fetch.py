@@ -0,0 +1,44 @@
+import asyncio
+
+from app.tools.mcp_tools import web_fetch_tool
+
+
+def fetch(url: str):
+    return asyncio.run(web_fetch_tool.fetch(url, max_chars=100000))
+
+
+def test_bulk_download_stops_at_the_byte_budget(fake_web, monkeypatch):
+    monkeypatch.setattr(web_fetch_tool, "streaming", False)
+    monkeypatch.setattr(web_fetch_tool, "max_bytes", 512)
+    result = fetch("http://pages.test/large")
+    assert result["status"] == "success"
+    assert result["truncated"] is True
+    assert result["bytes_read"] == 512
+    assert result["bytes_skipped"] > 0
+
+
+def test_bulk_download_reads_pages_within_the_budget_whole(fake_web):
+    result = fetch("http://pages.test/small")
+    assert result["status"] == "success"
+    assert result["truncated"] is False
+    assert result["bytes_skipped"] == 0
+
+
+def test_tracking_variants_are_served_from_the_first_download(fake_web):
+    first = fetch("http://pages.test/article?id=7")
+    variant = fetch("http://pages.test/article?utm_source=news&id=7")
+    assert variant["cache"] == "hit"
+    assert variant["url"] == first["url"] == "http://pages.test/article?id=7"
+    assert fake_web.requests == ["http://pages.test/article?id=7"]
+
+
+def test_stale_pages_are_revalidated_with_their_etag(fake_web):
+    fake_web.page_headers = {"etag": '"v1"', "cache-control": "max-age=0"}
+    assert fetch("http://pages.test/etag")["cache"] == "miss"
+    revalidated = fetch("http://pages.test/etag")
+    assert revalidated["cache"] == "revalidated" and revalidated["status"] == "success"
+    assert web_fetch_tool.cache.stats()["not_modified"] == 1
+
+    fake_web.page_headers = {"etag": '"v2"', "cache-control": "max-age=0"}
+    assert fetch("http://pages.test/etag")["cache"] == "miss"
+    assert len(fake_web.requests) == 3
@@ -0,0 +1,65 @@
+import re
+
+from fastapi.testclient import TestClient
+
+from app.metrics import MetricsRegistry
+from main import app
+
+SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? \S+$")
+
+
+def families(text: str):
+    declared, samples = [], set()
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            declared.append(line.split()[2])
+        elif line and not line.startswith("#"):
+            match = SAMPLE.match(line)
+            assert match, f"Malformed sample line: {line!r}"
+            samples.add(match.group(1))
+    return declared, samples
+
+
+def test_metrics_endpoint_declares_every_family_once():
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    declared, samples = families(response.text)
+    duplicates = sorted({name for name in declared if declared.count(name) > 1})
+    assert duplicates == []
+    assert "research_admission_active" in declared
+    for sample in samples:
+        assert re.sub(r"_(bucket|sum|count)$", "", sample) in declared or sample in declared
+
+
+def test_stats_fields_never_shadow_registered_metrics():
+    registry = MetricsRegistry(prefix="t")
+    registry.gauge("pool_active", "Active").set(2)
+    registry.register_stats("pool", lambda: {"active": 5, "idle": 1, "enabled": True, "name": "x"})
+    declared, _ = families(registry.render())
+    assert declared == ["t_pool_active", "t_pool_idle"]
+
+
+def test_request_metrics_use_route_templates():
+    client = TestClient(app)
+    for n in range(3):
+        client.get(f"/api/does-not-exist-{n}")
+    client.get("/api/traces?request_id=abc")
+    text = client.get("/metrics").text
+    assert 'endpoint="unmatched",status="404"' in text
+    assert "does-not-exist" not in text
+    assert 'endpoint="/api/traces"' in text
+
+
+def test_stats_fields_named_total_are_counters():
+    registry = MetricsRegistry(prefix="t")
+    registry.register_stats("pool", lambda: {"requests_total": 7, "open_connections": 2})
+    text = registry.render()
+    assert "# TYPE t_pool_requests_total counter" in text
+    assert "# TYPE t_pool_open_connections gauge" in text
+
+
+def test_metrics_endpoint_types_only_counters_with_total():
+    types = dict(line.split()[2:4] for line in TestClient(app).get("/metrics").text.splitlines()
+                 if line.startswith("# TYPE "))
+    assert {name for name, kind in types.items() if name.endswith("_total")} == \
+        {name for name, kind in types.items() if kind == "counter"}
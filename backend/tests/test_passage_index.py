@@ -0,0 +1,87 @@
+import asyncio
+import importlib
+import time
+
+from app.agents.context import ResearchContext
+from app.services.orchestrator import orchestrator
+from app.tools import mcp_tools
+from app.tools.passage_index import PassageIndex
+
+# app.agents re-exports the research_agents singleton under the module's name
+research_agents = importlib.import_module("app.agents.research_agents")
+
+PYTHON_PAGE = (
+    "Python is a high-level, general-purpose programming language. Its design emphasizes readability. "
+    "Python was released in 1991 and is often compared with Java. "
+) * 3
+
+
+def test_search_ranks_passages_and_reports_coverage():
+    index = PassageIndex(max_passages=100, passage_chars=200)
+    index.add_document("https://a.example", "Python", PYTHON_PAGE)
+    index.add_document("https://b.example", "Gardening", "Water tomatoes daily and prune the roses in spring. " * 5)
+    results = index.search("python readability", k=3)
+    assert results and results[0]["url"] == "https://a.example"
+    assert results[0]["coverage"] == 1.0
+    assert index.search("tomatoes")[0]["url"] == "https://b.example"
+
+
+def test_documents_are_fresh_only_until_their_cache_entry_expires():
+    index = PassageIndex()
+    index.add_document("https://cached.example", "Cached", PYTHON_PAGE, expires_at=time.time() + 60)
+    index.add_document("https://stale.example", "Stale", PYTHON_PAGE + " stale", expires_at=time.time() - 1)
+    index.add_document("https://uncached.example", "Uncached", PYTHON_PAGE + " uncached")
+    assert index.is_fresh("https://cached.example")
+    assert not index.is_fresh("https://stale.example")
+    assert not index.is_fresh("https://uncached.example")
+    assert not index.is_fresh("https://missing.example")
+
+
+def test_eviction_keeps_the_index_bounded():
+    index = PassageIndex(max_passages=4, passage_chars=100)
+    for n in range(10):
+        index.add_document(f"https://{n}.example", "Page", f"Page number {n} talks about topic{n}. " * 5)
+    assert index.stats()["passages"] <= 4
+    assert "https://9.example" in index and "https://0.example" not in index
+
+
+def shortcut(monkeypatch, question, enabled=True, min_score=0.0, expires_in=60.0):
+    index = PassageIndex()
+    for n in range(2):
+        index.add_document(f"https://python{n}.example", "Python", PYTHON_PAGE + f" copy {n}", time.time() + expires_in)
+    monkeypatch.setattr(research_agents, "passage_index", index)
+    monkeypatch.setattr(research_agents, "INDEX_SHORTCUT_ENABLED", enabled)
+    monkeypatch.setattr(research_agents, "EVIDENCE_MIN_SCORE", min_score)
+    monkeypatch.setattr(research_agents, "FETCH_FIRST_N", 2)
+    return research_agents.research_agents._answer_from_index(ResearchContext(question))
+
+
+def test_index_shortcut_is_opt_in(monkeypatch):
+    assert not shortcut(monkeypatch, "When was Python released?", enabled=False)
+    assert shortcut(monkeypatch, "When was Python released?")
+
+
+def test_index_shortcut_requires_score_and_freshness(monkeypatch):
+    assert not shortcut(monkeypatch, "When was Python released?", min_score=1000.0)
+    assert not shortcut(monkeypatch, "When was Python released?", expires_in=-1.0)
+
+
+def test_search_can_be_restricted_to_some_pages():
+    index = PassageIndex(max_passages=100, passage_chars=200)
+    index.add_document("https://a.example", "Python", PYTHON_PAGE)
+    index.add_document("https://b.example", "Java", "Java was released in 1995 and runs on Android. " * 5)
+    assert {p["url"] for p in index.search("released", urls={"https://b.example"})} == {"https://b.example"}
+    assert index.search("released", urls=set()) == []
+
+
+def test_answers_cite_only_pages_fetched_for_the_question(fake_web, monkeypatch):
+    index = PassageIndex()
+    index.add_document("https://docs.python.org/3/tutorial/", "Python tutorial",
+                       "How to build an Android app with Python: the tutorial covers Android apps. " * 3)
+    monkeypatch.setattr(research_agents, "passage_index", index)
+    monkeypatch.setattr(mcp_tools, "passage_index", index)
+    monkeypatch.setattr(orchestrator.answer_cache, "enabled", False)
+
+    result = asyncio.run(orchestrator.process_query("How do I build an Android app?", deadline_ms=0))
+    cited = {citation["url"] for citation in result["citations"]}
+    assert cited and all(url.startswith("http://pages.test/") for url in cited)
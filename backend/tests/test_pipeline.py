@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.agents.pipeline import LatencyModel, Pipeline, Stage
+
+
+def test_consumers_see_items_as_soon_as_they_are_published():
+    events = []
+
+    async def produce(pipe):
+        for n in range(3):
+            pipe.emit("numbers", n)
+            events.append(f"emit {n}")
+            await asyncio.sleep(0)
+
+    async def consume(pipe):
+        async for n in pipe.stream("numbers"):
+            events.append(f"got {n}")
+            pipe.emit("squares", n * n)
+
+    async def run():
+        pipe = Pipeline([
+            Stage("produce", produce, produces=["numbers"]),
+            Stage("consume", consume, consumes=["numbers"], produces=["squares"]),
+        ])
+        await pipe.run()
+        return await pipe.collect("squares")
+
+    assert asyncio.run(run()) == [0, 1, 4]
+    assert events.index("got 0") < events.index("emit 2")
+
+
+def test_pipeline_rejects_missing_producers_and_cycles():
+    async def noop(pipe):
+        pass
+
+    with pytest.raises(ValueError, match="nothing produces"):
+        Pipeline([Stage("a", noop, consumes=["x"])])
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline([Stage("a", noop, consumes=["y"], produces=["x"]), Stage("b", noop, consumes=["x"], produces=["y"])])
+
+
+def test_failing_stage_cancels_the_others():
+    async def fail(pipe):
+        raise RuntimeError("boom")
+
+    async def wait(pipe):
+        async for _ in pipe.stream("never"):
+            pass
+
+    async def run():
+        await Pipeline([Stage("fail", fail, produces=["unused"]), Stage("never", wait, produces=["never"]),
+                        Stage("wait", wait, consumes=["never"])]).run()
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(run())
+
+
+def test_latency_model_parses_specs():
+    assert LatencyModel("off").delays_ms == {}
+    assert LatencyModel("default").delays_ms == LatencyModel.DEFAULTS
+    assert LatencyModel("research=50, analysis=5").delays_ms == {"research": 50.0, "analysis": 5.0}
+    with pytest.raises(ValueError):
+        LatencyModel("thinking=10")
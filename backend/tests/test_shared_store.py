@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from app.tools.shared_store import SharedStore
+
+
+def stores(tmp_path):
+    # Two handles on one database stand in for two worker processes
+    path = str(tmp_path / "shared.db")
+    return SharedStore(path=path), SharedStore(path=path)
+
+
+def test_waiter_sees_the_lease_holders_result(tmp_path):
+    holder, waiter = stores(tmp_path)
+
+    async def run():
+        assert await holder.lease("fetch_result", "page", ttl=5)
+        assert not await waiter.lease("fetch_result", "page", ttl=5)
+        waiting = asyncio.ensure_future(waiter.wait_for("fetch_result", "page", timeout=2, interval=0.01))
+        await asyncio.sleep(0.05)
+        await holder.set("fetch_result", "page", {"content": "done"}, ttl=10)
+        await holder.release("fetch_result", "page")
+        return await waiting
+
+    assert asyncio.run(run()) == {"content": "done"}
+    assert holder.stats()["leases_won"] == 1 and waiter.stats()["lease_waits"] == 1
+
+
+def test_waiter_stops_when_the_lease_is_released_without_a_result(tmp_path):
+    holder, waiter = stores(tmp_path)
+
+    async def run():
+        await holder.lease("fetch_result", "page", ttl=5)
+        waiting = asyncio.ensure_future(waiter.wait_for("fetch_result", "page", timeout=2, interval=0.01))
+        await asyncio.sleep(0.05)
+        await holder.release("fetch_result", "page")
+        return await waiting
+
+    started = time.monotonic()
+    assert asyncio.run(run()) is None
+    assert time.monotonic() - started < 1
+
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    holder, other = stores(tmp_path)
+
+    async def run():
+        assert await holder.lease("fetch_result", "page", ttl=0.05)
+        assert not await other.lease("fetch_result", "page", ttl=5)
+        await asyncio.sleep(0.1)  # the holder died without releasing
+        return await other.lease("fetch_result", "page", ttl=5)
+
+    assert asyncio.run(run())
+
+
+def test_disabled_store_always_grants_the_lease():
+    store = SharedStore(path="")
+    assert asyncio.run(store.lease("fetch_result", "page", ttl=5))
+    assert asyncio.run(store.get("fetch_result", "page")) is None
@@ -0,0 +1,81 @@
+import json
+import os
+
+from app.agents.topics import TopicMatcher, keyword_tokens
+
+
+def topic(topic_id: str, keywords, **fields):
+    return dict({"id": topic_id, "keywords": keywords, "answer": f"{topic_id} answer", "reasoning": ""}, **fields)
+
+
+def write_topics(path, *topics, default=None):
+    data = {"version": 1, "topics": list(topics)}
+    if default is not None:
+        data["default"] = default
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def matcher(tmp_path, *topics) -> TopicMatcher:
+    return TopicMatcher(write_topics(tmp_path / "topics.json", *topics), reload_interval=0)
+
+
+def test_keyword_tokens_split_on_punctuation():
+    assert keyword_tokens("Explain AI, please!") == ["explain", "ai", "please"]
+
+
+def test_keywords_match_whole_words_only(tmp_path):
+    topics = matcher(tmp_path, topic("ai", ["ai"]), topic("html", ["html"]))
+    assert topics.match("Explain how the moon works")["id"] == "default"
+    assert topics.match("What is XHTML?")["id"] == "default"
+    assert topics.match("Explain AI, please")["id"] == "ai"
+
+
+def test_multi_word_keywords_match_as_a_phrase(tmp_path):
+    topics = matcher(tmp_path, topic("ml", ["machine learning"]))
+    assert topics.match("How does machine learning work?")["id"] == "ml"
+    assert topics.match("Is this machine good at learning?")["id"] == "default"
+
+
+def test_lowest_priority_wins(tmp_path):
+    topics = matcher(tmp_path, topic("python", ["python"]), topic("ai", ["ai"]))
+    assert topics.match("AI in Python")["id"] == "python"  # file order by default
+    topics = matcher(tmp_path, topic("python", ["python"], priority=5), topic("ai", ["ai"], priority=1))
+    assert topics.match("AI in Python")["id"] == "ai"
+
+
+def test_default_answer_fills_in_the_question(tmp_path):
+    path = write_topics(tmp_path / "topics.json", topic("ai", ["ai"]), default={"answer": "About {question}"})
+    topics = TopicMatcher(path, reload_interval=0)
+    assert topics.render(topics.match("tides"), "tides")["answer"] == "About tides"
+
+
+def test_edited_file_is_reloaded(tmp_path):
+    topics = matcher(tmp_path, topic("ai", ["ai"]))
+    assert topics.match("Tell me about Rust")["id"] == "default"
+    path = write_topics(tmp_path / "topics.json", topic("ai", ["ai"]), topic("rust", ["rust"]))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert topics.match("Tell me about Rust")["id"] == "rust"
+    assert topics.loads == 2
+
+
+def test_invalid_file_keeps_the_previous_topics(tmp_path):
+    topics = matcher(tmp_path, topic("ai", ["ai"]))
+    path = tmp_path / "topics.json"
+    path.write_text("{not json", encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert topics.match("Explain AI")["id"] == "ai"
+    assert topics.load_errors == 1
+
+    write_topics(path, topic("ai", ["ai"]), topic("dup", ["x"]), topic("dup", ["y"]))
+    assert not topics.load()
+    assert topics.match("Explain AI")["id"] == "ai"
+
+
+def test_missing_file_falls_back_to_the_builtin_default(tmp_path):
+    topics = TopicMatcher(str(tmp_path / "missing.json"), reload_interval=0)
+    assert topics.load_errors == 1
+    result = topics.render(topics.match("What is Python?"), "What is Python?")
+    assert result["topic"] == "default" and "What is Python?" in result["answer"]
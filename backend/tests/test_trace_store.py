@@ -0,0 +1,50 @@
+import json
+import multiprocessing
+import os
+import time
+
+from app.services.trace_store import TraceStore
+from app.tracing import TraceRecord
+
+RECORD = TraceRecord(agent="researcher", action="web_search", tool="mcp_web_search",
+                     input={"query": "q"}, output={"results_count": 3}, status="success")
+
+
+def write_batches(path: str, max_bytes: int, worker: int, batches: int):
+    # A slow rename widens the window in which another worker could rotate too
+    replace = os.replace
+    os.replace = lambda src, dst: (time.sleep(0.05), replace(src, dst))
+    store = TraceStore(path=path, max_bytes=max_bytes)
+    for n in range(batches):
+        store._write([({"request_id": f"{worker}-{n}", "question": "q", "partial": False}, [RECORD])])
+
+
+def test_concurrent_workers_rotate_once_without_losing_records(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    workers, batches = 4, 50
+    line_bytes = len(json.dumps({"request_id": "0-0", "question": "q", "partial": False,
+                                 "trace": [RECORD.to_dict()]})) + 1
+    # Everything fits in two generations, so nothing may be rotated away
+    max_bytes = line_bytes * workers * batches * 2 // 3
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=write_batches, args=(path, max_bytes, worker, batches))
+                 for worker in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    ids = []
+    for name in (f"{path}.1", path):
+        with open(name, encoding="utf-8") as f:
+            ids += [json.loads(line)["request_id"] for line in f]
+    assert sorted(ids) == sorted(f"{worker}-{n}" for worker in range(workers) for n in range(batches))
+
+
+def test_query_filters_stored_traces(tmp_path):
+    store = TraceStore(path=str(tmp_path / "traces.jsonl"))
+    store._write([({"request_id": "a", "question": "What is Python?", "partial": False}, [RECORD]),
+                  ({"request_id": "b", "question": "What is Rust?", "partial": True}, [RECORD])])
+    assert [t["request_id"] for t in store._scan(None, "rust", None, None, None, 10)] == ["b"]
+    assert [t["request_id"] for t in store._scan(None, None, "researcher", None, False, 10)] == ["a"]
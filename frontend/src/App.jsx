@@ -1,20 +1,63 @@
 import { useState } from 'react'
-import axios from 'axios'
 import './index.css'
 
+const API_URL = 'http://127.0.0.1:8000'
+
 function App() {
   const [question, setQuestion] = useState('')
   const [response, setResponse] = useState(null)
   const [loading, setLoading] = useState(false)
 
+  const applyEvent = (raw) => {
+    const eventLine = raw.match(/^event: (.*)$/m)
+    const dataLine = raw.match(/^data: (.*)$/m)
+    if (!eventLine || !dataLine) return
+
+    const data = JSON.parse(dataLine[1])
+    setResponse((prev) => {
+      switch (eventLine[1]) {
+        case 'trace':
+          return { ...prev, trace: [...prev.trace, data] }
+        case 'citation':
+          return { ...prev, citations: [...prev.citations, data] }
+        case 'answer':
+          return { ...prev, ...data }
+        case 'error':
+          return { error: data.detail }
+        default:
+          return prev
+      }
+    })
+  }
+
   const handleSubmit = async (e) => {
     e.preventDefault()
     if (!question.trim()) return
 
     setLoading(true)
+    setResponse({ answer: '', reasoning: '', citations: [], trace: [] })
     try {
-      const result = await axios.post('http://127.0.0.1:8000/api/ask', { question })
-      setResponse(result.data)
+      const result = await fetch(`${API_URL}/api/ask/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ question })
+      })
+      if (!result.ok) {
+        throw new Error(`Request failed with status code ${result.status}`)
+      }
+
+      // Apply Server-Sent Events as they arrive
+      const reader = result.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const events = buffer.split('\n\n')
+        buffer = events.pop()
+        events.forEach(applyEvent)
+      }
     } catch (error) {
       console.error('Error:', error)
       setResponse({ 
@@ -60,7 +103,7 @@ function App() {
               <>
                 <div className="response-section">
                   <h3 className="response-title">Answer</h3>
-                  <p className="response-text">{response.answer}</p>
+                  <p className="response-text">{response.answer || (loading && 'Researching...')}</p>
                 </div>
                 
                 <div className="response-section">